@@ -0,0 +1,48 @@
+"""
+Exports the weights of a model made by AITrain.create_model to a .npz file for numpy_model.NumpyModel,
+batch normalisation is folded into the convolution before it and dropout is left out as it does nothing when evaluating
+usage: python AI/export_weights.py AI/chess5M.keras AI/chess5M.npz
+"""
+
+import sys
+import numpy as np
+import tensorflow as tf
+
+def fold_batch_norm(conv,batch_norm):
+    """
+    returns kernel and bias of conv with batch_norm applied after it folded in
+    """
+    kernel,bias=conv.get_weights()
+    gamma,beta,mean,variance=batch_norm.get_weights()
+    scale=gamma/np.sqrt(variance+batch_norm.epsilon)
+    return kernel*scale,(bias-mean)*scale+beta
+
+def export_weights(model_file,npz_file):
+    """
+    writes the weights of the model in model_file to npz_file
+    """
+    model=tf.keras.models.load_model(model_file)
+    convs=[layer for layer in model.layers if isinstance(layer,tf.keras.layers.Conv2D)]
+    batch_norms=[layer for layer in model.layers if isinstance(layer,tf.keras.layers.BatchNormalization)]
+    denses=[layer for layer in model.layers if isinstance(layer,tf.keras.layers.Dense)]
+    #the residual is the 1x1 convolution straight from the input, it has no batch normalisation
+    residual=[conv for conv in convs if conv.kernel_size==(1,1)]
+    convs=[conv for conv in convs if conv.kernel_size!=(1,1)]
+    if len(convs)!=3 or len(batch_norms)!=3 or len(residual)!=1 or len(denses)!=3:
+        raise ValueError(f"Not a model made by create_model: {model_file}")
+    weights={}
+    for i,(conv,batch_norm) in enumerate(zip(convs,batch_norms),1):
+        weights[f"conv{i}_kernel"],weights[f"conv{i}_bias"]=fold_batch_norm(conv,batch_norm)
+    weights["residual_kernel"],weights["residual_bias"]=residual[0].get_weights()
+    for i,dense in enumerate(denses,1):
+        weights[f"dense{i}_kernel"],weights[f"dense{i}_bias"]=dense.get_weights()
+    for name,array in weights.items():
+        array=array.astype(np.float32)
+        #l2 regularisation leaves weights so small they can't change an evaluation, numpy is many times slower
+        #on the subnormal numbers they make where tensorflow treats them as 0
+        array[np.abs(array)<1e-20]=0
+        weights[name]=array
+    np.savez(npz_file,**weights)
+
+if __name__=="__main__":
+    export_weights(sys.argv[1],sys.argv[2])
@@ -25,5 +25,48 @@ def fen_to_tensor(fen):
     else:
         turn_tensor=np.zeros((8,8,1))
     return np.concatenate([board_tensor,turn_tensor],axis=2) # axis 2 makes 8x8x12 into 8x8x13
-        
+
+#plane for each piece as Board stores it, colours are the other way round to fen
+board_pieces={piece.swapcase():plane for piece,plane in pieces.items()}
+
+def board_to_tensor(b,out=None):
+    """
+    converts Board b straight to the same tensor as fen_to_tensor(b.board_to_fen()) without making the fen,
+    as float32, filled into out (8x8x13) if given rather than a new array
+    """
+    if out is None:
+        out=np.zeros((8,8,13),dtype=np.float32)
+    else:
+        out.fill(0)
+    board=b.board
+    squares=b.piece_positions(0)+b.piece_positions(1)
+    #square 0 is a8, the first row of the fen
+    out.reshape(64,13)[squares,[board_pieces[board[pos]] for pos in squares]]=1
+    if b.turn==b.WHITE:
+        out[:,:,12]=1
+    return out
+
+def boards_to_tensor(boards,out=None):
+    """
+    converts list of Boards to one Nx8x8x13 float32 tensor, filled into out (at least N long) if given
+    """
+    if out is None:
+        out=np.zeros((len(boards),8,8,13),dtype=np.float32)
+    else:
+        out=out[:len(boards)]
+        out.fill(0)
+    indexes=[]
+    squares=[]
+    planes=[]
+    for i,b in enumerate(boards):
+        board=b.board
+        for pos in b.piece_positions(0)+b.piece_positions(1):
+            indexes.append(i)
+            squares.append(pos)
+            planes.append(board_pieces[board[pos]])
+        if b.turn==b.WHITE:
+            out[i,:,:,12]=1
+    out.reshape(len(boards),64,13)[indexes,squares,planes]=1
+    return out
+
 #print(fen_to_tensor("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"))
\ No newline at end of file
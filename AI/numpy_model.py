@@ -0,0 +1,49 @@
+"""
+Runs the evaluation network with numpy using weights exported by export_weights.py, for single positions
+this is quicker than tensorflow as there is no per call overhead, and tensorflow doesn't need importing
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def conv2d(x,kernel,bias):
+    """
+    same padded convolution of x (Nx8x8xC) with kernel (KxKxCxF), returns Nx8x8xF
+    """
+    size=kernel.shape[0]
+    if size>1:
+        pad=size//2
+        x=np.pad(x,((0,0),(pad,pad),(pad,pad),(0,0)))
+        #every KxK patch, Nx8x8xCxKxK turned round to match the kernel's KxKxC order
+        x=sliding_window_view(x,(size,size),axis=(1,2)).transpose(0,1,2,4,5,3)
+    n,rows,cols=x.shape[:3]
+    out=x.reshape(n*rows*cols,-1)@kernel.reshape(-1,kernel.shape[3])
+    out+=bias
+    return out.reshape(n,rows,cols,-1)
+
+def relu(x):
+    """
+    relu in place
+    """
+    return np.maximum(x,0,out=x)
+
+class NumpyModel:
+    """
+    The network made by AITrain.create_model, called with a batch of Nx8x8x13 tensors it returns an Nx1 array
+    of evaluations the same as the keras model (to float32 rounding)
+    """
+    def __init__(self,npz_file):
+        with np.load(npz_file) as weights:
+            self.weights={name:weights[name] for name in weights.files}
+
+    def __call__(self,x):
+        w=self.weights
+        x=np.asarray(x,dtype=np.float32)
+        h=relu(conv2d(x,w["conv1_kernel"],w["conv1_bias"]))
+        h=relu(conv2d(h,w["conv2_kernel"],w["conv2_bias"]))
+        h+=conv2d(x,w["residual_kernel"],w["residual_bias"])
+        h=relu(conv2d(h,w["conv3_kernel"],w["conv3_bias"]))
+        h=h.mean(axis=(1,2)) # global average pooling
+        h=relu(h@w["dense1_kernel"]+w["dense1_bias"])
+        h=relu(h@w["dense2_kernel"]+w["dense2_bias"])
+        return h@w["dense3_kernel"]+w["dense3_bias"]
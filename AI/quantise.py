@@ -0,0 +1,135 @@
+"""
+Post training int8 quantisation of a model made by AITrain.create_model with tensorflow lite, weights and
+activations are stored as 8 bit integers with the ranges of the activations measured on calibration positions
+then benchmarks it against the float model on positions held out from calibration, on its own and inside a search
+usage: python -m AI.quantise AI/chess5M.keras AI/chess5M.tflite [AI/lichess_db_eval.csv]
+"""
+
+import csv
+import os
+import random
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from AI.fen_to_tensor import fen_to_tensor
+from AI.tflite_model import TFLiteModel
+
+def load_fens(data,size,skip=0):
+    """
+    returns size fens from the csv data after skipping the first skip rows
+    """
+    fens=[]
+    with open(data,"r") as file:
+        for i,row in enumerate(csv.reader(file)):
+            if i>=skip:
+                fens.append(row[0])
+            if len(fens)==size:
+                break
+    return fens
+
+def random_fens(size,seed=0):
+    """
+    returns size fens from games of random moves, for when there is no csv to calibrate on
+    """
+    from chess.bitboard import BitBoard
+    rng=random.Random(seed)
+    fens=[]
+    while len(fens)<size:
+        b=BitBoard.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -")
+        for ply in range(rng.randrange(4,80)):
+            moves=b.valid_moves_int(b.turn)
+            if len(moves)==0:
+                break
+            b.move_int(rng.choice(moves))
+        if b.status() not in ("white win","black win","draw"):
+            fens.append(b.board_to_fen())
+    return fens
+
+def quantise(model_file,tflite_file,fens):
+    """
+    writes an int8 tensorflow lite version of the keras model in model_file to tflite_file, calibrated on fens
+    input and output stay float32 so it is used the same way as the keras model
+    """
+    model=tf.keras.models.load_model(model_file)
+    def representative_dataset():
+        for fen in fens:
+            yield [np.expand_dims(fen_to_tensor(fen).astype(np.float32),axis=0)]
+    converter=tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations=[tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset=representative_dataset
+    converter.target_spec.supported_ops=[tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(tflite_file,"wb") as file:
+        file.write(converter.convert())
+
+def benchmark(model_file,tflite_file,fens,batch_size=64):
+    """
+    runs the float keras model and the int8 model on fens, returns dictionary of batch 1 latency (ms) and
+    batch_size throughput (positions/s) for each and the mean and largest absolute difference in evaluation (pawns)
+    """
+    keras_model=tf.keras.models.load_model(model_file)
+    infer=tf.function(lambda x:keras_model(x),input_signature=[tf.TensorSpec((None,8,8,13),tf.float32)])
+    models={"float":lambda x:infer(x).numpy(),"int8":TFLiteModel(tflite_file)}
+    x=np.stack([fen_to_tensor(fen) for fen in fens]).astype(np.float32)
+    results={}
+    outputs={}
+    for name,model in models.items():
+        model(x[:1]) # warm up
+        start=time.perf_counter()
+        for i in range(len(x)):
+            model(x[i:i+1])
+        results[f"{name} latency"]=(time.perf_counter()-start)/len(x)*1000
+        outputs[name]=np.concatenate([model(x[i:i+batch_size]) for i in range(0,len(x),batch_size)])
+        start=time.perf_counter()
+        for i in range(0,len(x),batch_size):
+            model(x[i:i+batch_size])
+        results[f"{name} throughput"]=len(x)/(time.perf_counter()-start)
+    error=np.abs(outputs["int8"]-outputs["float"])
+    results["mean error"]=float(error.mean())
+    results["max error"]=float(error.max())
+    return results
+
+def search_benchmark(model_file,tflite_file,fens,depth=2):
+    """
+    times the AI engine searching each of fens to depth with the float and then the int8 model, returns dictionary
+    of the average seconds per search and model evaluations per second for each
+    each search starts with an empty evaluation cache so every position it evaluates goes to the model
+    """
+    from chess.alphabetapruning import AlphabetaPruningAI
+    from chess.AIEvaluationMixin import load_model
+    from chess.bitboard import BitBoard
+    from chess.lrucache import LRUCache
+    results={}
+    for name,file in (("float",model_file),("int8",tflite_file)):
+        elapsed=0
+        evaluations=0
+        for fen in fens:
+            engine=AlphabetaPruningAI(BitBoard.from_fen(fen),depth)
+            #the engine is pointed at the model being timed rather than the one it loads by default
+            engine.model,engine.infer=load_model(file)
+            engine.eval_cache=LRUCache(engine.eval_cache_size)
+            start=time.perf_counter()
+            engine.best_move()
+            elapsed+=time.perf_counter()-start
+            evaluations+=len(engine.eval_cache)
+        results[f"{name} search"]=elapsed/len(fens)
+        results[f"{name} search evaluations"]=evaluations/elapsed
+    return results
+
+if __name__=="__main__":
+    model_file,tflite_file=sys.argv[1],sys.argv[2]
+    data=sys.argv[3] if len(sys.argv)>3 else "AI/lichess_db_eval.csv"
+    if os.path.exists(data):
+        calibration,held_out=load_fens(data,1000),load_fens(data,1000,skip=1000)
+    else:
+        print(f"{data} not found, calibrating on positions from random games")
+        calibration,held_out=random_fens(1000,seed=0),random_fens(1000,seed=1)
+    quantise(model_file,tflite_file,calibration)
+    results=benchmark(model_file,tflite_file,held_out)
+    results.update(search_benchmark(model_file,tflite_file,held_out[:10]))
+    print(f"Size: float {os.path.getsize(model_file)} bytes, int8 {os.path.getsize(tflite_file)} bytes")
+    for name in ("float","int8"):
+        print(f"{name:5} latency {results[name+' latency']:7.3f}ms throughput {results[name+' throughput']:9.0f} positions/s")
+    print(f"Mean absolute error {results['mean error']:.3f} pawns, largest {results['max error']:.3f} pawns")
+    for name in ("float","int8"):
+        print(f"{name:5} search depth 2 {results[name+' search']:7.3f}s per move {results[name+' search evaluations']:9.0f} evaluations/s")
@@ -0,0 +1,65 @@
+"""
+Runs a tensorflow lite model, such as the int8 one made by quantise.py, the ai_edge_litert interpreter is used if
+it is installed so tensorflow isn't needed, otherwise the one in tensorflow
+"""
+
+import numpy as np
+
+def make_interpreter(model_file):
+    """
+    returns tensorflow lite interpreter for model_file
+    """
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter=tf.lite.Interpreter
+    return Interpreter(model_path=model_file)
+
+class TFLiteModel:
+    """
+    Called with a batch of Nx8x8x13 tensors returns an Nx1 array of evaluations, the same as the keras model
+    it was made from apart from the error quantisation adds
+    resizing an interpreter reallocates its tensors so there is an interpreter for each of a few fixed batch sizes,
+    made the first time it is needed, other batches are padded with zeros to the next size and bigger ones are run
+    batch_size at a time, the sizes are 1 and multiples of 8 up to batch_size so padding never costs much
+    """
+    def __init__(self,model_file,batch_size=64):
+        self.model_file=model_file
+        self.batch_size=batch_size # the same as AIEvaluationMixin.batch_size so its batches fit exactly
+        self.sizes=sorted({1,*range(8,batch_size,8),batch_size})
+        self.interpreters={} # (interpreter,input index,output index) by batch size
+        self.padded=np.zeros((batch_size,8,8,13),dtype=np.float32) # partial batches are copied in here
+
+    def interpreter(self,batch):
+        """
+        returns (interpreter,input index,output index) set up for batch positions
+        """
+        if batch not in self.interpreters:
+            interpreter=make_interpreter(self.model_file)
+            input_index=interpreter.get_input_details()[0]["index"]
+            interpreter.resize_tensor_input(input_index,(batch,8,8,13))
+            interpreter.allocate_tensors()
+            self.interpreters[batch]=interpreter,input_index,interpreter.get_output_details()[0]["index"]
+        return self.interpreters[batch]
+
+    def run(self,x):
+        """
+        runs up to batch_size positions, padded to the next batch size there is an interpreter for
+        """
+        count=len(x)
+        size=next(size for size in self.sizes if size>=count)
+        if size!=count:
+            self.padded[:count]=x
+            self.padded[count:size]=0
+            x=self.padded[:size]
+        interpreter,input_index,output_index=self.interpreter(size)
+        interpreter.set_tensor(input_index,x)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)[:count]
+
+    def __call__(self,x):
+        x=np.asarray(x,dtype=np.float32)
+        if len(x)<=self.batch_size:
+            return self.run(x)
+        return np.concatenate([self.run(x[start:start+self.batch_size]) for start in range(0,len(x),self.batch_size)])
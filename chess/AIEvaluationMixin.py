@@ -3,42 +3,160 @@ import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
-from AI.fen_to_tensor import fen_to_tensor
-import tensorflow as tf
-import numpy as np
+from chess.lrucache import LRUCache
+
+#tensorflow takes seconds to import so it and numpy are only imported when the first AI engine is made,
+#importing the engines to use SimpleEvaluationMixin doesn't pay for them
+tf=None
+np=None
+board_to_tensor=None
+boards_to_tensor=None
+
+def import_dependencies(tensorflow=True):
+    """
+    imports numpy, the tensor conversion and tensorflow (if tensorflow) the first time they are needed
+    """
+    global tf,np,board_to_tensor,boards_to_tensor
+    if np is None:
+        import numpy as np
+        from AI.fen_to_tensor import board_to_tensor,boards_to_tensor
+    if tensorflow and tf is None:
+        import tensorflow as tf
+
+#loaded models by file, each is loaded once per process and shared by every engine that uses it
+models={}
+
+def load_model(model):
+    """
+    returns (keras model,inference function) for model file, loading it the first time it is asked for
+    the inference function takes any batch of 8x8x13 float32 tensors so is only traced once, done here
+    so the first evaluation doesn't pay for it
+    a .npz file of weights from AI/export_weights.py is run with numpy and a .tflite file from AI/quantise.py
+    with tensorflow lite, each is both the model and the inference function
+    """
+    keras=not model.endswith((".npz",".tflite"))
+    import_dependencies(tensorflow=keras)
+    if model not in models and model.endswith(".npz"):
+        from AI.numpy_model import NumpyModel
+        numpy_model=NumpyModel(model)
+        models[model]=numpy_model,numpy_model
+    elif model not in models and model.endswith(".tflite"):
+        from AI.tflite_model import TFLiteModel
+        tflite_model=TFLiteModel(model,AIEvaluationMixin.batch_size)
+        models[model]=tflite_model,tflite_model
+    elif model not in models:
+        keras_model=tf.keras.models.load_model(model)
+        infer=tf.function(lambda x:keras_model(x),input_signature=[tf.TensorSpec((None,8,8,13),tf.float32)])
+        infer(np.zeros((1,8,8,13),dtype=np.float32))
+        models[model]=keras_model,infer
+    return models[model]
 
 class AIEvaluationMixin:
     """
     AI evaluation
     """
-    def __init__(self,model):
-        self.model=tf.keras.models.load_model(model)
-        #model=tf.keras.models.load_model("chess7500000.keras")
+    batch_size=64 # most positions given to the model at once by evaluate_batch
+    #how the model is run if not given to __init__, "keras", "numpy" for the .npz export next to the .keras file
+    #(no tensorflow needed) or "int8" for the quantised .tflite model next to it
+    inference="keras"
+    model_suffixes={"keras":".keras","numpy":".npz","int8":".tflite"}
+    eval_cache_size=500000 # most evaluations kept for each model
+    eval_cache_file=None # file the evaluation cache is loaded from when first made, written by save_eval_cache
+    #model evaluations by zobrist hash (which covers the side to move) for each model file, shared by every
+    #engine using the model so they are kept between moves
+    eval_caches={}
 
-    @tf.function
-    def infer(self,x):
-        """
-        speed up model inference
-        """
-        return self.model(x)
+    def __init__(self,model,inference=None):
+        if inference is not None:
+            self.inference=inference
+        if self.inference not in self.model_suffixes:
+            raise ValueError(f"Not a valid inference: {self.inference}")
+        model=os.path.splitext(model)[0]+self.model_suffixes[self.inference]
+        self.model,self.infer=load_model(model)
+        self.model_file=model
+        if model not in self.eval_caches:
+            self.eval_caches[model]=LRUCache(self.eval_cache_size)
+            if self.eval_cache_file is not None and os.path.exists(self.eval_cache_file):
+                self.load_eval_cache(self.eval_cache_file,self.eval_caches[model])
+        self.eval_cache=self.eval_caches[model]
+        #reused for every position rather than making new arrays each time
+        self.input_buffer=np.zeros((1,8,8,13),dtype=np.float32)
+        self.batch_buffer=np.zeros((self.batch_size,8,8,13),dtype=np.float32)
+        #model=tf.keras.models.load_model("chess7500000.keras")
 
     def evaluate(self,b):
         """
         returns number representing favour of board
         """
-        winlossdraw=b.winlossdraw()
+        winlossdraw=b.status()
         if winlossdraw=="white win":
             return 1000
         elif winlossdraw=="black win":
             return -1000
         elif winlossdraw=="draw":
             return 0
-        fen=b.board_to_fen()
-        input_tensor=fen_to_tensor(fen)
-        input_tensor=np.expand_dims(input_tensor, axis=0) # model expects batch
-        # batching experiment
-        # copies=1
-        # input_tensor=np.tile(input_tensor,(copies,1,1,1))
-        eval=self.infer(input_tensor)
-        eval=float(eval[0][0])
+        key=b.hash()
+        eval=self.eval_cache.get(key)
+        if eval is None:
+            board_to_tensor(b,self.input_buffer[0]) # model expects batch
+            eval=self.infer(self.input_buffer)
+            eval=float(eval[0][0])
+            self.eval_cache.put(key,eval)
         return eval
+
+    def evaluate_batch(self,boards):
+        """
+        returns list of evaluations of boards, the same as evaluate on each but running the model on up to
+        batch_size positions at a time as each call to the model has a fixed cost however many positions it is given
+        only positions not in the evaluation cache are given to the model
+        """
+        evals=[None]*len(boards)
+        indexes=[]
+        playing=[]
+        for i,b in enumerate(boards):
+            winlossdraw=b.status()
+            if winlossdraw=="white win":
+                evals[i]=1000
+            elif winlossdraw=="black win":
+                evals[i]=-1000
+            elif winlossdraw=="draw":
+                evals[i]=0
+            else:
+                evals[i]=self.eval_cache.get(b.hash())
+                if evals[i] is None:
+                    indexes.append(i)
+                    playing.append(b)
+        if len(self.batch_buffer)<self.batch_size:
+            self.batch_buffer=np.zeros((self.batch_size,8,8,13),dtype=np.float32) # batch_size was made bigger
+        for start in range(0,len(playing),self.batch_size):
+            output=self.infer(boards_to_tensor(playing[start:start+self.batch_size],self.batch_buffer))
+            for i,eval in zip(indexes[start:start+self.batch_size],output[:,0]):
+                evals[i]=float(eval)
+                self.eval_cache.put(boards[i].hash(),evals[i])
+        return evals
+
+    def save_eval_cache(self,path=None):
+        """
+        writes the evaluation cache to path (eval_cache_file if not given) so a later run can start with it,
+        zobrist keys are the same every run
+        """
+        path=path or self.eval_cache_file
+        entries=self.eval_cache.entries
+        with open(path,"wb") as file:
+            #least recently used first so loading keeps the order
+            np.savez(file,model=np.array(self.model_file),keys=np.array(list(entries.keys()),dtype=np.uint64),
+                     evals=np.array(list(entries.values()),dtype=np.float64))
+
+    def load_eval_cache(self,path,cache=None):
+        """
+        adds the evaluations saved in path to cache (this model's if not given), ignored if they came from another model
+        returns number of evaluations added
+        """
+        cache=cache if cache is not None else self.eval_cache
+        with np.load(path) as data:
+            if str(data["model"])!=self.model_file:
+                return 0
+            keys,evals=data["keys"].tolist(),data["evals"].tolist()
+        for key,eval in zip(keys,evals):
+            cache.put(key,eval)
+        return len(keys)
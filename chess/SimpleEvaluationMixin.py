@@ -2,11 +2,12 @@ class SimpleEvaluationMixin:
     """
     Simple evaluation based on Claude Shannon's evaluation
     """
+    batch_size=1 # evaluating positions together saves nothing here
     def evaluate(self,b):
         """
         returns number representing favour of board
         """
-        winlossdraw=b.winlossdraw()
+        winlossdraw=b.status()
         if winlossdraw=="white win":
             return 1000
         elif winlossdraw=="black win":
@@ -21,4 +22,10 @@ class SimpleEvaluationMixin:
             piecedict[piece]+=1
         #return evaluation
         eval=200*(piecedict.get("k",0)-piecedict.get("K",0))+9*(piecedict.get("q",0)-piecedict.get("Q",0))+5*(piecedict.get("r",0)-piecedict.get("R",0))+3*(piecedict.get("b",0)-piecedict.get("b",0) + piecedict.get("n",0)-piecedict.get("N",0))+(piecedict.get("p",0)-piecedict.get("P",0))
-        return eval
\ No newline at end of file
+        return eval
+
+    def evaluate_batch(self,boards):
+        """
+        returns list of evaluations of boards
+        """
+        return [self.evaluate(b) for b in boards]
@@ -1,102 +1,369 @@
 from chess.SimpleEvaluationMixin import SimpleEvaluationMixin
 from chess.AIEvaluationMixin import AIEvaluationMixin
-from multiprocessing.pool import ThreadPool
+from chess.moveordering import MoveOrdering
+from chess.board import MOVE_CAPTURE,MOVE_CASTLE
+from chess.transpositiontable import TranspositionTable,SharedTranspositionTable,EXACT,LOWER,UPPER
 import time
 
+#width of the null window, evaluations can be floats so this is smaller than any real difference
+NULL_WINDOW=0.001
+
+class SearchTimeout(Exception):
+    """
+    raised inside the search when the time limit runs out, the unfinished iteration is thrown away
+    """
+
 class AlphabetaPruningBase():
     """
     Base class for AlphabetaPruning
     """
-    def __init__(self,board,depth):
+    max_depth=64 # deepest a timed search goes if no depth is given
+    max_quiescence_depth=8 # most takes quiescence looks at in a row
+    iterative=False # deepen one ply at a time even without a time limit
+    null_move_reduction=2 # how much shallower the search after a null move is
+    late_move_start=3 # moves after this many at a node can be reduced
+    def __init__(self,board,depth,tt_size=2**18,tt_replace="depth",quiescence=True,quiescence_evasions=False,
+                 null_move=True,null_move_verification=True,late_move_reductions=True,parallel=False,workers=None,
+                 batch_size=None):
+        #kept so worker processes can make the same kind of engine
+        self.options=dict(tt_size=tt_size,tt_replace=tt_replace,quiescence=quiescence,quiescence_evasions=quiescence_evasions,
+                          null_move=null_move,null_move_verification=null_move_verification,late_move_reductions=late_move_reductions,
+                          batch_size=batch_size)
         self.board=board
         self.depth=depth
         self.count=0
+        self.quiescence_count=0
+        self.use_quiescence=quiescence
+        self.quiescence_evasions=quiescence_evasions
+        self.use_null_move=null_move
+        self.null_move_verification=null_move_verification
+        self.use_late_move_reductions=late_move_reductions
+        if batch_size is not None:
+            self.batch_size=batch_size # otherwise the evaluation's own, leaves are evaluated together if more than 1
+        self.leaf_evals={} # evaluations of the leaves below the depth 1 node being searched, by zobrist hash
+        if parallel not in (False,"root","smp"):
+            raise ValueError(f"Not a valid parallel search: {parallel}")
+        self.parallel=parallel # False, "root" to split the root moves or "smp" for Lazy SMP
+        self.workers=workers # worker processes for parallel, one per core if None
+        self.pool=None # started by the first parallel search
+        self.reset_pruning_stats()
+        #kept between best_move calls, shared with the workers for Lazy SMP
+        if parallel=="smp":
+            self.tt=SharedTranspositionTable(tt_size,tt_replace)
+        else:
+            self.tt=TranspositionTable(tt_size,tt_replace)
+        self.deadline=None
+        self.stop=None # set by Lazy SMP to stop a helper's search when the main search finishes
+        self.root_depth=depth
+        self.ordering=MoveOrdering() # killers and history, also kept between best_move calls
     
-    def best_move(self):
+    def best_move(self,time_limit=None,max_depth=None):
         """
-        returns best move at set depth
+        returns best move at max_depth, the set depth if not given, with a time_limit in seconds it deepens
+        one ply at a time and returns the best move from the deepest search that finished in time
         """
+        if max_depth is None:
+            max_depth=self.depth if self.depth is not None else self.max_depth
         self.count=0
+        self.quiescence_count=0
+        self.leaf_evals.clear() # left by a search that timed out, the game may have moved on since
+        self.reset_pruning_stats()
+        self.tt.reset_stats()
+        self.ordering.new_search()
+        self.deadline=None
+        if self.parallel and self.pool is None:
+            from chess.parallel import RootSplitter,LazySMP # only paid for by parallel searches
+            self.pool=RootSplitter(self,self.workers) if self.parallel=="root" else LazySMP(self,self.workers)
+        if self.parallel=="smp":
+            self.pool.reset_stats()
         start=time.time()
-        eval=self.best_move_for_level(self.board,self.depth,-1000,1000)
+        board=self.board.copy() # the search walks this copy in place with move_int and pop
+        if time_limit is None and not self.iterative:
+            depths=[max_depth]
+        else:
+            depths=range(1,max_depth+1)
+        eval=None
+        for depth in depths:
+            self.root_depth=depth
+            try:
+                #the best move from the last iteration is in the transposition table so gets searched first
+                result=self.search_root(board,depth,None if eval is None else eval[0])
+            except SearchTimeout:
+                break
+            eval,finished_depth=result,depth
+            if time_limit is not None:
+                #the first iteration always finishes so there is a move to return
+                self.deadline=start+time_limit
+            if abs(eval[0])>=1000:
+                break # found a win, searching deeper won't change it
         dt=time.time()-start
-        print(f"Evaluations done: {self.count}, Best evaluation: {eval[0]}, Time taken: {round(dt,4)}")
-        return eval[1]
+        print(f"Evaluations done: {self.count}, Quiescence nodes: {self.quiescence_count}, Best evaluation: {eval[0]}, "
+              f"Time taken: {round(dt,4)}, Depth: {finished_depth}, TT hit rate: {round(100*self.tt.hit_rate(),1)}%, TT cutoffs: {self.tt.cutoffs}")
+        if self.use_null_move or self.use_late_move_reductions:
+            print(f"Null moves: {self.null_move_tries}, Null move cutoffs: {self.null_move_cutoffs}, Failed verifications: {self.null_move_verification_fails}, "
+                  f"Late move reductions: {self.reductions}, Reduced re-searches: {self.reduction_researches}")
+        if self.parallel=="smp":
+            print(f"Workers: {self.pool.workers}, Nodes per worker: {self.pool.node_counts}, Nodes per second: {round(self.pool.nodes_per_second())}")
+        if eval[1] is None:
+            return None
+        return board.int_to_move(eval[1]) # the GUI and UI work in algebraic
+
+    def reset_pruning_stats(self):
+        """
+        sets the null move and late move reduction counts back to 0
+        """
+        self.null_move_tries=0
+        self.null_move_cutoffs=0
+        self.null_move_verification_fails=0
+        self.reductions=0
+        self.reduction_researches=0
+
+    def in_check(self,board):
+        """
+        checks if the side to move is in check
+        """
+        king_pos=board.kings[board.turn]
+        return king_pos is not None and board.is_square_attacked(king_pos,1-board.turn)
+
+    def null_move_allowed(self,board,depth,in_check):
+        """
+        checks if null move pruning can be tried, not in check, deep enough to reduce and the side to move has
+        a piece other than pawns and king, with only those passing could be the best move (zugzwang)
+        """
+        if in_check or depth<=self.null_move_reduction:
+            return False
+        board_list=board.board
+        for pos in board.pieces[board.turn]:
+            if board_list[pos] not in "pPkK":
+                return True
+        return False
+
+    def search_root(self,board,depth,previous):
+        """
+        searches the root to depth, previous is the evaluation from the last iteration (None for the first)
+        """
+        if self.parallel=="root":
+            return self.parallel_search_root(board,depth)
+        if self.parallel=="smp":
+            return self.pool.search(self,board,depth)
+        return self.best_move_for_level(board,depth,-1000,1000)
+
+    def parallel_search_root(self,board,depth):
+        """
+        searches the root moves in worker processes, gives the same best move as searching them one after another
+        as a move that could be best is never cut off by the shared bound, returns evaluation and best move
+        """
+        key=board.hash()
+        entry=self.tt.probe(key)
+        movelist=self.sort_moves(board,board.valid_moves_int(board.turn),0,entry[3] if entry is not None else 0)
+        if len(movelist)==0:
+            self.count+=1
+            return self.evaluate(board),None
+        white=board.turn==board.WHITE
+        best_eval,best_move,best_key=None,None,None
+        for eval,move in self.pool.search(self,board,depth,movelist):
+            move_key=board.algebraic_key(move)
+            if best_move is None or ((eval,move_key)>(best_eval,best_key) if white else (eval,move_key)<(best_eval,best_key)):
+                best_eval,best_move,best_key=eval,move,move_key
+        self.tt.store(key,depth,best_eval,EXACT,best_move)
+        return best_eval,best_move
+
+    def close(self):
+        """
+        shuts down the worker processes of a parallel engine and frees a shared transposition table
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool=None
+        if self.parallel=="smp":
+            self.tt.close()
 
-    def best_move_for_level(self,board,depth,alpha,beta):
+    def best_move_for_level(self,board,depth,alpha,beta,null_ok=True):
         """
-        returns best move and evaluation, for current level and below until depth 0
+        returns best move (packed int) and evaluation, for current level and below until depth 0
         uses alpha-beta pruning to reduce searching, pseudo code wikipedia
+        null_ok is False straight after a null move and in verification searches
         """
         if depth==0:
             self.count+=1
-            return self.evaluate(board),None
-        movelist=board.valid_move_src_dst(board.turn)
-        movelist=self.sort_moves(board,movelist)
-        bestmovelist=[]
-
-        # multi threading experiment
-        if False:
-        # if depth==self.depth:
-            with ThreadPool() as pool:
-                def task(move):
-                    """
-                    uses a new thread for each sub tree of top level minimax tree
-                    """
-                    src,dst=move
-                    copyboard=board.copy()
-                    copyboard.move(src,dst)
-                    eval,move=self.best_move_for_level(copyboard,depth-1,alpha,beta)
-                    return eval,(src,dst)
-                bestmovelist=list(pool.imap(task,movelist))
-        else:         
-            if board.turn==board.WHITE: #maximising player
-                eval=-1000
-                for src,dst in movelist:
-                    copyboard=board.copy()
-                    copyboard.move(src,dst)
-                    eval,move=self.best_move_for_level(copyboard,depth-1,alpha,beta)
-                    bestmovelist.append((eval,(src,dst)))
-                    if eval>beta:
-                        break #beta cut off
-                    alpha=max(alpha,eval)
-                    
+            if self.use_quiescence:
+                #quiescence cuts off on a score equal to the window, widened so a score equal to alpha or beta here is exact
+                return self.quiescence(board,alpha-NULL_WINDOW,beta+NULL_WINDOW,0),None
+            return self.leaf_evaluate(board),None
+        if (self.deadline is not None and time.time()>self.deadline) or (self.stop is not None and self.stop.value):
+            raise SearchTimeout()
+        key=board.hash()
+        alpha_orig,beta_orig=alpha,beta
+        tt_move=0
+        entry=self.tt.probe(key)
+        if entry is not None:
+            tt_depth,tt_score,tt_bound,tt_move=entry
+            #the root is always searched so there is a move to return
+            if tt_depth>=depth and depth<self.root_depth:
+                if tt_bound==EXACT or (tt_bound==LOWER and tt_score>beta) or (tt_bound==UPPER and tt_score<alpha):
+                    self.tt.cutoffs+=1
+                    return tt_score,tt_move or None
+        ply=self.root_depth-depth
+        white=board.turn==board.WHITE
+        in_check=self.in_check(board)
+        if self.use_null_move and null_ok and depth<self.root_depth and self.null_move_allowed(board,depth,in_check):
+            #if passing still leaves the score past the window a real move will too, searched shallower with a null window
+            self.null_move_tries+=1
+            reduced=depth-1-self.null_move_reduction
+            board.push_null()
+            if white:
+                eval,reply=self.best_move_for_level(board,reduced,beta,beta+NULL_WINDOW,False)
+            else:
+                eval,reply=self.best_move_for_level(board,reduced,alpha-NULL_WINDOW,alpha,False)
+            board.pop_null()
+            if (eval>beta if white else eval<alpha):
+                if self.null_move_verification:
+                    #search this position without null moves at the reduced depth to catch zugzwang
+                    eval,reply=self.best_move_for_level(board,depth-self.null_move_reduction,alpha,beta,False)
+                if (eval>beta if white else eval<alpha):
+                    self.null_move_cutoffs+=1
+                    self.tt.store(key,depth,eval,LOWER if white else UPPER,0)
+                    return eval,None
+                self.null_move_verification_fails+=1
+        movelist=board.valid_moves_int(board.turn)
+        #best move last time this position was searched is tried first
+        movelist=self.sort_moves(board,movelist,ply,tt_move)
+        best_eval,best_move,best_key=None,None,None
+        killers=self.ordering.killers[ply] if ply<self.ordering.max_ply else ()
+        for i,move in enumerate(movelist):
+            if depth==1 and i==1:
+                #the first move didn't cut off so the rest are likely all needed
+                self.prefetch_leaves(board,movelist[1:])
+            board.move_int(move)
+            #not at the root, every root move gets a full search
+            if (self.use_late_move_reductions and i>=self.late_move_start and depth>=3 and ply>0 and not in_check
+                    and not move&(MOVE_CAPTURE|MOVE_CASTLE) and not move>>12&7 and move not in killers
+                    and not self.in_check(board)):
+                #quiet moves ordered late are unlikely to be best so get a shallower search first
+                self.reductions+=1
+                eval,best=self.best_move_for_level(board,depth-2,alpha,beta)
+                if (eval>alpha if white else eval<beta):
+                    self.reduction_researches+=1
+                    eval,best=self.best_move_for_level(board,depth-1,alpha,beta)
+            else:
+                eval,best=self.best_move_for_level(board,depth-1,alpha,beta)
+            board.pop()
+            #keep the best so far, equal evaluations go to the move that is later (white) or earlier (black) in algebraic
+            move_key=board.algebraic_key(move)
+            if best_move is None or ((eval,move_key)>(best_eval,best_key) if white else (eval,move_key)<(best_eval,best_key)):
+                best_eval,best_move,best_key=eval,move,move_key
+            if white: #maximising player
+                if eval>beta:
+                    self.ordering.cut_off(board,move,ply,depth)
+                    break #beta cut off
+                alpha=max(alpha,eval)
             else: #minimising player
-                eval=1000
-                for src,dst in movelist:
-                    copyboard=board.copy()
-                    copyboard.move(src,dst)
-                    eval,move=self.best_move_for_level(copyboard,depth-1,alpha,beta)
-                    bestmovelist.append((eval,(src,dst)))
-                    if eval<alpha:
-                        break #alpha cut off
-                    beta=min(beta,eval)
-                
-        bestmovelist.sort(reverse=board.turn==board.WHITE)
-        if len(bestmovelist)==0:
+                if eval<alpha:
+                    self.ordering.cut_off(board,move,ply,depth)
+                    break #alpha cut off
+                beta=min(beta,eval)
+        if depth==1:
+            self.leaf_evals.clear() # only meant for this node's children
+
+        if best_move is None:
             self.count+=1
             return self.evaluate(board),None
-        return bestmovelist[0]
+        #cut offs only happen when a move goes past the window so a score on the edge is exact
+        if best_eval<alpha_orig:
+            bound=UPPER
+        elif best_eval>beta_orig:
+            bound=LOWER
+        else:
+            bound=EXACT
+        self.tt.store(key,depth,best_eval,bound,best_move)
+        return best_eval,best_move
     
-    def sort_moves(self,board,moves):
+    def quiescence(self,board,alpha,beta,qdepth):
         """
-        sort moves so takes are first to make alpha-beta pruning more efficient
+        carries on searching takes (and every move when in check if quiescence_evasions) past the end of the search
+        so positions aren't evaluated half way through swapping pieces, the side to move can stand pat instead of
+        taking so the evaluation is a bound on the score, returns evaluation
+        unlike the main search a score equal to the window cuts off, a take that only draws level isn't worth following
         """
-        notake=[]
-        take=[]
-        for src,dst in moves:
-            if board.board[board.algebraic_to_pos(dst)]!=".":
-                take.append((src,dst))
+        if qdepth>0:
+            self.quiescence_count+=1
+        status=board.status()
+        stand_pat=self.leaf_evaluate(board)
+        if status in ("white win","black win","draw") or qdepth>=self.max_quiescence_depth:
+            return stand_pat
+        in_check=self.quiescence_evasions and status.endswith("in check")
+        white=board.turn==board.WHITE
+        if in_check:
+            #can't stand pat in check, every way out has to be looked at
+            best=-1000 if white else 1000
+            moves=board.valid_moves_int(board.turn)
+        else:
+            best=stand_pat
+            if white:
+                if stand_pat>=beta:
+                    return stand_pat
+                alpha=max(alpha,stand_pat)
+            else:
+                if stand_pat<=alpha:
+                    return stand_pat
+                beta=min(beta,stand_pat)
+            moves=[move for move in board.valid_moves_int(board.turn) if move&MOVE_CAPTURE or move>>12&7]
+        for move in self.ordering.order(board,moves,self.max_depth):
+            board.move_int(move)
+            eval=self.quiescence(board,alpha,beta,qdepth+1)
+            board.pop()
+            if white:
+                best=max(best,eval)
+                if eval>=beta:
+                    break
+                alpha=max(alpha,eval)
             else:
-                notake.append((src,dst))
-        return take+notake
+                best=min(best,eval)
+                if eval<=alpha:
+                    break
+                beta=min(beta,eval)
+        return best
+
+    def prefetch_leaves(self,board,movelist):
+        """
+        evaluates the positions after each move in movelist together with evaluate_batch ready for leaf_evaluate,
+        done at depth 1 where every child is a leaf once the first move hasn't cut off, does nothing unless
+        batch_size is more than 1
+        """
+        self.leaf_evals.clear()
+        if self.batch_size<=1:
+            return
+        children=[]
+        for move in movelist:
+            board.move_int(move)
+            children.append(board.copy())
+            board.pop()
+        for child,eval in zip(children,self.evaluate_batch(children)):
+            self.leaf_evals[child.hash()]=eval
+
+    def leaf_evaluate(self,board):
+        """
+        evaluation of board, from the last prefetch_leaves if it evaluated board
+        """
+        if self.leaf_evals:
+            eval=self.leaf_evals.pop(board.hash(),None)
+            if eval is not None:
+                return eval
+        return self.evaluate(board)
+
+    def sort_moves(self,board,moves,ply=0,hash_move=0):
+        """
+        sort moves so the ones most likely to be best are first to make alpha-beta pruning more efficient
+        """
+        return self.ordering.order(board,moves,ply,hash_move)
 
 class AlphabetaPruning(AlphabetaPruningBase,SimpleEvaluationMixin):
-    def __init__(self,board,depth):
-        AlphabetaPruningBase.__init__(self,board,depth)
+    def __init__(self,board,depth,**options):
+        AlphabetaPruningBase.__init__(self,board,depth,**options)
         SimpleEvaluationMixin.__init__(self)
 
 class AlphabetaPruningAI(AlphabetaPruningBase,AIEvaluationMixin):
-    def __init__(self,board,depth):
-        AlphabetaPruningBase.__init__(self,board,depth)
-        AIEvaluationMixin.__init__(self,"AI/chess5M.keras")
\ No newline at end of file
+    def __init__(self,board,depth,inference=None,**options):
+        AlphabetaPruningBase.__init__(self,board,depth,**options)
+        self.options["inference"]=inference # workers run the model the same way
+        AIEvaluationMixin.__init__(self,"AI/chess5M.keras",inference)
\ No newline at end of file
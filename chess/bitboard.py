@@ -0,0 +1,300 @@
+"""
+Bitboard implementation of the Chess Board, the position is kept as a 64 bit integer per piece as well as
+the board list so move generation and check detection can use precomputed attack tables
+"""
+
+from chess.board import *
+
+#bit n of a bitboard is board position n, so a8 is bit 0 and h1 is bit 63
+
+PIECE_COLOUR={"p":Board.WHITE,"n":Board.WHITE,"b":Board.WHITE,"r":Board.WHITE,"q":Board.WHITE,"k":Board.WHITE,
+              "P":Board.BLACK,"N":Board.BLACK,"B":Board.BLACK,"R":Board.BLACK,"Q":Board.BLACK,"K":Board.BLACK}
+
+#pawn, knight, bishop, rook, queen, king letters indexed by colour
+PIECE_LETTERS=["PNBRQK","pnbrqk"]
+
+#back row for castling indexed by colour
+BACK_ROW=[0xff,0xff<<56]
+
+def build_leaper_table(directions):
+    """
+    attacks for pieces that jump a fixed vector (knight, king, pawn takes), one bitboard per square
+    """
+    table=[]
+    for pos in range(64):
+        x,y=pos%8,pos//8
+        attacks=0
+        for dx,dy in directions:
+            if 0<=x+dx<8 and 0<=y+dy<8:
+                attacks|=1<<(x+dx+(y+dy)*8)
+        table.append(attacks)
+    return table
+
+def build_ray_table(dx,dy):
+    """
+    squares a sliding piece passes over going in direction dx,dy from each square on an empty board
+    """
+    table=[]
+    for pos in range(64):
+        x,y=pos%8+dx,pos//8+dy
+        ray=0
+        while 0<=x<8 and 0<=y<8:
+            ray|=1<<(x+y*8)
+            x+=dx
+            y+=dy
+        table.append(ray)
+    return table
+
+KNIGHT_ATTACKS=build_leaper_table([(1,2),(-1,2),(2,1),(2,-1),(1,-2),(-1,-2),(-2,1),(-2,-1)])
+KING_ATTACKS=build_leaper_table([(1,0),(0,1),(1,1),(-1,0),(-1,1),(0,-1),(1,-1),(-1,-1)])
+#indexed by colour, white pawns go up the board
+PAWN_ATTACKS=[build_leaper_table([(1,1),(-1,1)]),build_leaper_table([(1,-1),(-1,-1)])]
+
+#rays are split by whether they go to higher positions (first blocker is the lowest set bit)
+#or lower positions (first blocker is the highest set bit)
+ROOK_RAYS=([build_ray_table(1,0),build_ray_table(0,1)],[build_ray_table(-1,0),build_ray_table(0,-1)])
+BISHOP_RAYS=([build_ray_table(1,1),build_ray_table(-1,1)],[build_ray_table(1,-1),build_ray_table(-1,-1)])
+
+def slider_attacks(pos,occupied,positive_rays,negative_rays):
+    """
+    squares attacked by a sliding piece on pos, each ray is cut off after the first piece it hits
+    """
+    attacks=0
+    for rays in positive_rays:
+        ray=rays[pos]
+        blockers=ray&occupied
+        if blockers:
+            ray^=rays[(blockers&-blockers).bit_length()-1]
+        attacks|=ray
+    for rays in negative_rays:
+        ray=rays[pos]
+        blockers=ray&occupied
+        if blockers:
+            ray^=rays[blockers.bit_length()-1]
+        attacks|=ray
+    return attacks
+
+def bit_positions(bitboard):
+    """
+    returns the positions of the set bits in a bitboard, lowest first
+    """
+    positions=[]
+    while bitboard:
+        lowest=bitboard&-bitboard
+        positions.append(lowest.bit_length()-1)
+        bitboard^=lowest
+    return positions
+
+class BitBoard(Board):
+    """
+    This class is a Board that also keeps bitboards for each piece and colour, it has the same interface
+    as Board but generates moves and checks with attack tables instead of walking the board list
+    """
+    #if changed, change copy method to include change
+    __slots__="bitboards","occupancy","pins"
+    #own caches as moves come out in a different order to Board
+    valid_moves_cache=LRUCache(50000)
+    status_cache=LRUCache(200000)
+
+    def __init__(self,startboard=None,turn=Board.WHITE,chess960=False):
+        #Board.__init__ calls rehash which makes the bitboards
+        Board.__init__(self,startboard,turn,chess960)
+
+    def rehash(self):
+        """
+        works out the zobrist keys, where the pieces are and the bitboards from scratch, see Board.rehash
+        """
+        Board.rehash(self)
+        self.bitboards=dict.fromkeys("pnbrqkPNBRQK",0)
+        self.occupancy=[0,0] # [black,white]
+        self.pins=None # (hash,colour,in check,pinned bitboard) for the last position legality was worked out
+        for pos,piece in enumerate(self.board):
+            if piece!=".":
+                self.bitboards[piece]|=1<<pos
+                self.occupancy[PIECE_COLOUR[piece]]|=1<<pos
+
+    def set_square(self,pos,piece):
+        """
+        puts piece (in letter form, "." for empty) on pos keeping the bitboards up to date
+        """
+        bit=1<<pos
+        old=self.board[pos]
+        if old!=".":
+            self.bitboards[old]^=bit
+            self.occupancy[PIECE_COLOUR[old]]^=bit
+        if piece!=".":
+            self.bitboards[piece]|=bit
+            self.occupancy[PIECE_COLOUR[piece]]|=bit
+        Board.set_square(self,pos,piece)
+
+    def is_square_attacked(self,pos,by,occupied=None,removed=0):
+        """
+        checks if any piece of colour by attacks pos, occupied overrides the occupied squares and
+        pieces on removed are ignored so a move can be tried without changing the board
+        """
+        bitboards=self.bitboards
+        if occupied is None:
+            occupied=self.occupancy[0]|self.occupancy[1]
+        keep=~removed
+        pawn,knight,bishop,rook,queen,king=PIECE_LETTERS[by]
+        #a pawn of the other colour on pos attacks the squares pawns attacking pos stand on
+        if PAWN_ATTACKS[1-by][pos]&bitboards[pawn]&keep:
+            return True
+        if KNIGHT_ATTACKS[pos]&bitboards[knight]&keep:
+            return True
+        if KING_ATTACKS[pos]&bitboards[king]:
+            return True
+        queens=bitboards[queen]
+        straight=(bitboards[rook]|queens)&keep
+        if straight and slider_attacks(pos,occupied,*ROOK_RAYS)&straight:
+            return True
+        diagonal=(bitboards[bishop]|queens)&keep
+        if diagonal and slider_attacks(pos,occupied,*BISHOP_RAYS)&diagonal:
+            return True
+        return False
+
+    def is_move_out_of_check(self,src,dst):
+        """
+        tries the move on the bitboards and sees if the moving side's king is attacked afterwards
+        """
+        piece=self.board[src]
+        colour=PIECE_COLOUR[piece]
+        if self.occupancy[colour]>>dst&1:
+            #castling, king moves onto its own rook, castling_moves has already checked the squares
+            return True
+        if piece=="k" or piece=="K":
+            king_pos=dst
+        else:
+            king_pos=self.king_square(colour)
+            if king_pos is None:
+                return True
+        removed=1<<dst
+        if (piece=="p" or piece=="P") and len(self.enpassant_check)>0 and self.enpassant_check[2]==dst:
+            #the pawn taken en passant might have been blocking a check along the row
+            removed|=1<<(dst+8 if piece=="p" else dst-8)
+        occupied=(self.occupancy[0]|self.occupancy[1])&~(1<<src)&~removed|(1<<dst)
+        return not self.is_square_attacked(king_pos,1-colour,occupied,removed)
+
+    def legality(self,colour):
+        """
+        returns if colour's king is in check and a bitboard of colour's pieces pinned to it, worked out
+        once per position so moves that can't uncover a check don't have to be tried
+        """
+        key=self.hash()
+        if self.pins is not None and self.pins[0]==key and self.pins[1]==colour:
+            return self.pins[2],self.pins[3]
+        king_pos=self.king_square(colour)
+        if king_pos is None:
+            in_check,pinned=False,0
+        else:
+            in_check=self.is_square_attacked(king_pos,1-colour)
+            pinned=0
+            occupied=self.occupancy[0]|self.occupancy[1]
+            own=self.occupancy[colour]
+            pawn,knight,bishop,rook,queen,king=PIECE_LETTERS[1-colour]
+            queens=self.bitboards[queen]
+            for rays,sliders in (ROOK_RAYS,self.bitboards[rook]|queens),(BISHOP_RAYS,self.bitboards[bishop]|queens):
+                if not sliders:
+                    continue
+                seen=slider_attacks(king_pos,occupied,*rays)
+                #a blocker is pinned if taking it away lets a slider not already giving check see the king
+                for pos in bit_positions(seen&own):
+                    if slider_attacks(king_pos,occupied&~(1<<pos),*rays)&sliders&~seen:
+                        pinned|=1<<pos
+        self.pins=(key,colour,in_check,pinned)
+        return in_check,pinned
+
+    def castling_moves(self,src,turn,checkcheck):
+        """
+        960 castling for the king on src, the destination is the rook's position like in Board.king
+        """
+        moves=0
+        occupied=self.occupancy[0]|self.occupancy[1]
+        king=PIECE_LETTERS[turn][5]
+        rooks=self.bitboards[PIECE_LETTERS[turn][3]]&BACK_ROW[turn]
+        #closest rook on the a-side and furthest on the h-side like Board.find_rooks
+        left=rooks&((1<<src)-1)
+        right=rooks&~((2<<src)-1)
+        for side in left,right:
+            if side==0:
+                continue
+            rook_pos=side.bit_length()-1
+            if rook_pos not in self.unmoved:
+                continue
+            king_dst,rook_dst=self.castle_squares(king,src,rook_pos)
+            low=min(src,rook_pos,king_dst,rook_dst)
+            high=max(src,rook_pos,king_dst,rook_dst)
+            others=occupied&~(1<<src)&~(1<<rook_pos)
+            #everything between where the king and rook start and end has to be empty
+            if others&((2<<high)-(1<<low)):
+                continue
+            if checkcheck:
+                #the king can't pass through or land on an attacked square
+                path=range(min(src,king_dst),max(src,king_dst)+1)
+                if any(self.is_square_attacked(pos,1-turn,others) for pos in path):
+                    continue
+            moves|=1<<rook_pos
+        return moves
+
+    def moves_from(self,src,checkcheck=True,turn=None):
+        """
+        valid moves for the piece on position src, returns list of positions
+        """
+        piece=self.board[src]
+        if piece==".":
+            raise EmptySquareError("src not a piece")
+        if turn is None:
+            turn=PIECE_COLOUR[piece]
+        own=self.occupancy[turn]
+        occupied=self.occupancy[0]|self.occupancy[1]
+        kind=piece.lower()
+        if kind=="p":
+            if turn==self.WHITE:
+                step,home_row=-8,6
+            else:
+                step,home_row=8,1
+            moves=PAWN_ATTACKS[turn][src]&self.occupancy[1-turn]
+            one=src+step
+            if 0<=one<64 and not occupied>>one&1:
+                moves|=1<<one
+                two=one+step
+                if src//8==home_row and not occupied>>two&1:
+                    moves|=1<<two
+            #enpassant, the square taken to has to be diagonally in front of this pawn
+            if src in self.enpassant_check and abs(self.enpassant_check[2]-one)==1:
+                moves|=1<<self.enpassant_check[2]
+        elif kind=="n":
+            moves=KNIGHT_ATTACKS[src]&~own
+        elif kind=="b":
+            moves=slider_attacks(src,occupied,*BISHOP_RAYS)&~own
+        elif kind=="r":
+            moves=slider_attacks(src,occupied,*ROOK_RAYS)&~own
+        elif kind=="q":
+            moves=(slider_attacks(src,occupied,*BISHOP_RAYS)|slider_attacks(src,occupied,*ROOK_RAYS))&~own
+        else:
+            moves=KING_ATTACKS[src]&~own
+            if src in self.unmoved and (checkcheck==False or not self.is_square_attacked(src,1-turn)):
+                moves|=self.castling_moves(src,turn,checkcheck)
+        valid_moves=bit_positions(moves)
+        if checkcheck:
+            in_check,pinned=self.legality(PIECE_COLOUR[piece])
+            #only king moves, pinned pieces, en passant and getting out of check can leave the king attacked
+            if in_check or kind=="k" or pinned>>src&1 or (kind=="p" and src in self.enpassant_check):
+                valid_moves=[dst for dst in valid_moves if self.is_move_out_of_check(src,dst)]
+        return valid_moves
+
+    def piece_positions(self,turn):
+        """
+        positions of the pieces of colour turn, lowest first
+        """
+        return bit_positions(self.occupancy[turn])
+
+    def copy(self):
+        """
+        return copy of this board including the bitboards
+        """
+        copy=Board.copy(self)
+        copy.bitboards=self.bitboards.copy()
+        copy.occupancy=self.occupancy[:]
+        copy.pins=self.pins
+        return copy
@@ -3,6 +3,7 @@ This is the implemenation of the Chess Board
 """
 
 import random
+from chess.lrucache import LRUCache
 
 class ChessError(ValueError):
     """
@@ -24,6 +25,73 @@ class InvalidMoveError(ChessError):
 class InvalidColorError(ChessError):
     pass
 
+def build_rays(directions,slide):
+    """
+    for each position the lists of squares reached going in each direction, one step only if slide is False
+    """
+    rays=[]
+    for pos in range(64):
+        pos_rays=[]
+        for dx,dy in directions:
+            x,y=pos%8+dx,pos//8+dy
+            ray=[]
+            while 0<=x<8 and 0<=y<8:
+                ray.append(x+y*8)
+                if not slide:
+                    break
+                x+=dx
+                y+=dy
+            if ray:
+                pos_rays.append(ray)
+        rays.append(pos_rays)
+    return rays
+
+#moves are packed into an int: bits 0-5 src, bits 6-11 dst, bits 12-14 the piece promoted to
+#(index into PROMOTION_PIECES, 0 for none) and the flags from bit 16
+MOVE_CAPTURE=1<<16
+MOVE_CASTLE=1<<17
+MOVE_ENPASSANT=1<<18
+MOVE_DOUBLE_PAWN=1<<19
+PROMOTION_PIECES=".nbrq"
+
+def encode_move(src,dst,promotion=0,flags=0):
+    """
+    packs a move into an int, src and dst as pos and promotion as an index into PROMOTION_PIECES
+    """
+    return src|dst<<6|promotion<<12|flags
+
+def move_src(move):
+    """
+    src pos of a packed move
+    """
+    return move&63
+
+def move_dst(move):
+    """
+    dst pos of a packed move
+    """
+    return move>>6&63
+
+def move_promotion(move):
+    """
+    piece letter a packed move promotes to ("q" or "n", "b", "r"), None if it isn't a promotion
+    """
+    promotion=move>>12&7
+    if promotion==0:
+        return None
+    return PROMOTION_PIECES[promotion]
+
+def build_zobrist_keys(seed):
+    """
+    random 64 bit keys for zobrist hashing, a fixed seed means a position hashes the same in every run
+    """
+    rng=random.Random(seed)
+    pieces={piece:[rng.getrandbits(64) for i in range(64)] for piece in "pnbrqkPNBRQK"}
+    pieces["."]=[0]*64 # empty squares don't change the key
+    unmoved=[rng.getrandbits(64) for i in range(64)]
+    enpassant=[rng.getrandbits(64) for i in range(64)]
+    return pieces,unmoved,enpassant,rng.getrandbits(64)
+
 class Board:
     """
     This class represents a chess board and knows how to calculate valid moves
@@ -39,10 +107,14 @@ class Board:
     reverse_notation = {}
     for i, square in enumerate(notation):
         reverse_notation[square]=i
+    #where each position comes when the algebraic names are sorted, so packed moves can be sorted like (src,dst) tuples
+    notation_order=[0]*64
+    for i, square in enumerate(sorted(notation)):
+        notation_order[reverse_notation[square]]=i
     
     #creates "slots" for class variables decreasing memory usage and increasing speed
     #if changed, change copy method to include change
-    __slots__="board","turn","move_count","states","enpassant_check","unmoved","valid_moves_cache"
+    __slots__="board","turn","move_count","states","enpassant_check","unmoved","undo_stack","zobrist","rights_zobrist","pieces","kings"
     
     startposition=("RNBQKBNR"
                    "PPPPPPPP"
@@ -57,6 +129,23 @@ class Board:
     BLACK=0
     WHITE=1
 
+    #squares looked at from a position by is_square_attacked
+    straight_rays=build_rays([(1,0),(0,1),(-1,0),(0,-1)],True)
+    diagonal_rays=build_rays([(1,1),(-1,1),(1,-1),(-1,-1)],True)
+    knight_squares=[[ray[0] for ray in rays] for rays in build_rays([(1,2),(-1,2),(2,1),(2,-1),(1,-2),(-1,-2),(-2,1),(-2,-1)],False)]
+    king_squares=[[ray[0] for ray in rays] for rays in build_rays([(1,0),(0,1),(1,1),(-1,0),(-1,1),(0,-1),(1,-1),(-1,-1)],False)]
+    #where pawns that attack a position stand, indexed by colour, white pawns go up the board so attack from below
+    pawn_squares=[[[ray[0] for ray in rays] for rays in build_rays([(1,-1),(-1,-1)],False)],
+                  [[ray[0] for ray in rays] for rays in build_rays([(1,1),(-1,1)],False)]]
+
+    #zobrist keys for pieces on squares, unmoved castles and kings, en passant squares and white to move
+    zobrist_pieces,zobrist_unmoved,zobrist_enpassant,zobrist_white=build_zobrist_keys(1)
+
+    #caches shared by every board of this class and keyed by position, so copies and transpositions
+    #reached by different move orders reuse them, the size can be changed with resize
+    valid_moves_cache=LRUCache(50000)
+    status_cache=LRUCache(200000)
+
     def __init__(self, startboard=None,turn=WHITE,chess960=False):
         if startboard is None:
             startboard=Board.startposition
@@ -69,13 +158,51 @@ class Board:
             self.board[i]=piece
         self.turn=turn
         self.move_count=0
-        self.states=[]
+        self.states=None # history of positions as (zobrist,parent) links, None at the start
         self.enpassant_check=[]
+        self.undo_stack=[]
         self.unmoved={0,7,4,56,63,60} # unmoved castles and kings positions
         if chess960:
             self.unmoved={self.find_piece("R")[0],self.find_piece("R")[1],self.find_piece("K")[0],self.find_piece("r")[0],self.find_piece("r")[1],self.find_piece("k")[0]}
-        self.clear_caches()
+        self.rehash()
     
+    @classmethod
+    def from_fen(cls,fen):
+        """
+        makes a board from fen notation, castling can be KQkq or the files of the castles for chess 960
+        """
+        placement,turn,castling,enpassant,*_=fen.split()+["-","-"]
+        startboard=""
+        for char in placement.replace("/",""):
+            if char.isdigit():
+                startboard+="."*int(char)
+            else:
+                startboard+=char.swapcase() # colours are other way round
+        board=cls(startboard,turn=cls.WHITE if turn=="w" else cls.BLACK)
+        board.unmoved=set()
+        for char in castling.replace("-",""):
+            if char.isupper():
+                king,rook,row="k","r",56
+            else:
+                king,rook,row="K","R",0
+            king_pos=board.find_piece(king)[0]
+            rooks=[pos for pos in range(row,row+8) if board.board[pos]==rook]
+            if char in "Kk":
+                rook_pos=rooks[-1]
+            elif char in "Qq":
+                rook_pos=rooks[0]
+            else:
+                rook_pos=row+"abcdefgh".index(char.lower())
+            board.unmoved.update((king_pos,rook_pos))
+        if enpassant!="-":
+            #the pawn that moved 2 is in front of the square it passed over
+            pos=board.algebraic_to_pos(enpassant)
+            board.turn=1-board.turn
+            board.enpassant(pos-8 if board.turn==cls.WHITE else pos+8)
+            board.turn=1-board.turn
+        board.rehash()
+        return board
+
     @staticmethod
     def randomize960():
         """
@@ -115,9 +242,69 @@ class Board:
     
     def clear_caches(self):
         """
-        clear caches after board state changes
+        empties the shared caches, only needed if the board list is changed without set_square and rehash
+        """
+        self.valid_moves_cache.clear()
+        self.status_cache.clear()
+
+    def cache_key(self,turn,checkcheck):
+        """
+        key identifying the position for the valid moves cache
         """
-        self.valid_moves_cache={}
+        return (self.hash(),turn,checkcheck)
+
+    def rehash(self):
+        """
+        works out the zobrist keys and where the pieces are from scratch, after that move keeps them up to date
+        zobrist covers where the pieces are, rights_zobrist the unmoved castles and kings and en passant
+        """
+        self.zobrist=0
+        self.pieces=[set(),set()] # positions of [black,white] pieces
+        self.kings=[None,None] # [black,white] king positions
+        for pos,piece in enumerate(self.board):
+            self.zobrist^=self.zobrist_pieces[piece][pos]
+            if piece!=".":
+                colour=self.check_piece_color(piece)
+                self.pieces[colour].add(pos)
+                if piece=="k" or piece=="K":
+                    self.kings[colour]=pos
+        self.rights_zobrist=self.enpassant_zobrist(self.enpassant_check)
+        for pos in self.unmoved:
+            self.rights_zobrist^=self.zobrist_unmoved[pos]
+
+    def enpassant_zobrist(self,enpassant_check):
+        """
+        zobrist key for the en passant state
+        """
+        if len(enpassant_check)==0:
+            return 0
+        return self.zobrist_enpassant[enpassant_check[2]]
+
+    def hash(self):
+        """
+        64 bit zobrist key of the whole position including side to move, same position gives the same key
+        """
+        if self.turn==self.WHITE:
+            return self.zobrist^self.rights_zobrist^self.zobrist_white
+        return self.zobrist^self.rights_zobrist
+
+    def set_square(self,pos,piece):
+        """
+        puts piece (in letter form, "." for empty) on pos, all changes to the board during a move go through here
+        """
+        old=self.board[pos]
+        self.zobrist^=self.zobrist_pieces[old][pos]^self.zobrist_pieces[piece][pos]
+        if old!=".":
+            colour=0 if old<"a" else 1 # uppercase is black
+            self.pieces[colour].discard(pos)
+            if self.kings[colour]==pos:
+                self.kings[colour]=None
+        if piece!=".":
+            colour=0 if piece<"a" else 1
+            self.pieces[colour].add(pos)
+            if piece=="k" or piece=="K":
+                self.kings[colour]=pos
+        self.board[pos]=piece
     
     def display(self):
         """
@@ -237,8 +424,8 @@ class Board:
         dst=self.move_pos(src,-1,dy)
         if self.take_okay(dst,turn):
             valid_moves.append(dst)
-        #enpassant
-        if src in self.enpassant_check:
+        #enpassant, the square taken to has to be diagonally in front of this pawn
+        if src in self.enpassant_check and abs(self.enpassant_check[2]-(src+dy*8))==1:
             valid_moves.append(self.enpassant_check[2])
         return valid_moves
     
@@ -345,32 +532,46 @@ class Board:
         directions=[(1,0),(0,1),(1,1),(-1,0),(-1,1),(0,-1),(1,-1),(-1,-1)]
         for x,y in directions:
             dst=self.move_pos(src,x,y)
-            if self.move_okay(dst,turn=turn) and (checkcheck==False or self.is_check(dst,turn)==False):
+            if self.move_okay(dst,turn=turn) and (checkcheck==False or not self.is_square_attacked(dst,1-turn)):
                 valid_moves.append(dst)
-        def is_okay(src):
-            """
-            checks if square is blank and king wouldn't be in check if moved there
-            """
-            return self.board[src]=="." and (checkcheck==False or not self.is_check(src,turn))
         #960 castling: a-side castle king to c-file rook to d-file, h-side castle king to g-file rook to f-file
-        if src in self.unmoved and (checkcheck==False or self.is_check(src)==False):
-            left_rook,right_rook=self.find_rooks(src)
-            #a-side
-            if left_rook is not None and left_rook in self.unmoved and all(is_okay(i) for i in range(left_rook+1,src)):
-                valid_moves.append(left_rook)
-            #h-side
-            if right_rook is not None and right_rook in self.unmoved and all(is_okay(i) for i in range(src+1,right_rook)):
-                valid_moves.append(right_rook)
-        for move in valid_moves:
-            if checkcheck==True and self.is_check(move,turn):
-                valid_moves.remove(move)
+        if src in self.unmoved and (checkcheck==False or not self.is_square_attacked(src,1-turn)):
+            #[a-side,h-side]
+            for rook in self.find_rooks(src):
+                if rook is not None and rook in self.unmoved and self.can_castle(src,rook,turn,checkcheck):
+                    valid_moves.append(rook)
         return valid_moves
+
+    def can_castle(self,king_pos,rook_pos,turn,checkcheck=True):
+        """
+        checks the squares for castling the king on king_pos with the rook on rook_pos, everything between
+        where they start and end has to be empty and the king can't pass through or land on an attacked square
+        """
+        board=self.board
+        king_dst,rook_dst=self.castle_squares(board[king_pos],king_pos,rook_pos)
+        for pos in range(min(king_pos,rook_pos,king_dst,rook_dst),max(king_pos,rook_pos,king_dst,rook_dst)+1):
+            if pos!=king_pos and pos!=rook_pos and board[pos]!=".":
+                return False
+        if checkcheck:
+            #looked at with the king and rook off the board as they could be blocking an attack
+            king,rook=board[king_pos],board[rook_pos]
+            board[king_pos],board[rook_pos]=".","."
+            attacked=any(self.is_square_attacked(pos,1-turn) for pos in range(min(king_pos,king_dst),max(king_pos,king_dst)+1))
+            board[king_pos],board[rook_pos]=king,rook
+            if attacked:
+                return False
+        return True
     
     def piece_moves(self,src,checkcheck=True,turn=None):
         """
-        Takes an algebraic src, finds the colour and the piece and runs the function for it.
+        Takes an algebraic src and returns the valid moves for the piece on it
+        """
+        return self.moves_from(self.algebraic_to_pos(src),checkcheck,turn)
+
+    def moves_from(self,src,checkcheck=True,turn=None):
+        """
+        Takes a src pos, finds the colour and the piece and runs the function for it, returns list of positions
         """
-        src=self.algebraic_to_pos(src)
         piece = self.board[src]
         valid_moves=[]
         if turn is None:
@@ -396,25 +597,82 @@ class Board:
     
     def all_valid_moves(self,turn,checkcheck=True):
         """
-        Iterate through all the number srcs and find run piece_moves for each
+        Valid move destinations for every piece of colour turn
+        """
+        return [move>>6&63 for move in self.valid_moves_int(turn,checkcheck)]
+    
+    def piece_positions(self,turn):
+        """
+        positions of the pieces of colour turn, lowest first
+        """
+        return sorted(self.pieces[turn])
+
+    def king_square(self,colour):
+        """
+        position of the king of colour, None if it has no king
+        """
+        return self.kings[colour]
+
+    def encode_move(self,src,dst):
+        """
+        packs the move from src to dst (as pos) into an int with the flags for what kind of move it is,
+        the flags let the search order moves without looking at the board again
+        """
+        board=self.board
+        piece=board[src]
+        captured=board[dst]
+        if captured!=".":
+            if self.check_piece_color(captured)==self.check_piece_color(piece):
+                #king moving onto its own rook
+                return src|dst<<6|MOVE_CASTLE
+            flags=MOVE_CAPTURE
+        else:
+            flags=0
+        if piece=="p" or piece=="P":
+            if dst<8 or dst>=56:
+                return src|dst<<6|4<<12|flags # always promotes to queen
+            if abs(dst-src)==16:
+                return src|dst<<6|MOVE_DOUBLE_PAWN
+            if captured=="." and (dst-src)%8!=0:
+                return src|dst<<6|MOVE_CAPTURE|MOVE_ENPASSANT
+        return src|dst<<6|flags
+
+    def valid_moves_int(self,turn,checkcheck=True):
+        """
+        Valid moves for colour turn as packed ints, the move list the search works with,
+        the list is shared through the cache so mustn't be changed
         """
         #get valid moves from cache if possible
-        cache_key=(turn,checkcheck,tuple(self.board),tuple(self.enpassant_check),frozenset(self.unmoved))
+        cache_key=self.cache_key(turn,checkcheck)
         cached_valid_moves=self.valid_moves_cache.get(cache_key)
         if cached_valid_moves is not None:
             return cached_valid_moves
-        valid_moves=[]
-        for i in self.notation:
-            if self.check_piece_color(self.board[self.algebraic_to_pos(i)])!=turn:
-                continue
-            try:
-                new_moves=self.piece_moves(i,checkcheck=checkcheck,turn=turn)
-                valid_moves.extend(new_moves)
-            except EmptySquareError as e:
-                print(e)
-        self.valid_moves_cache[cache_key]=valid_moves # cache valid moves
-        return valid_moves
-    
+        moves=[]
+        encode=self.encode_move
+        for src in self.piece_positions(turn):
+            for dst in self.moves_from(src,checkcheck,turn):
+                moves.append(encode(src,dst))
+        self.valid_moves_cache.put(cache_key,moves) # cache valid moves
+        return moves
+
+    def move_to_int(self,src,dst):
+        """
+        packs an algebraic move, for moves coming in from the GUI or UI
+        """
+        return self.encode_move(self.algebraic_to_pos(src),self.algebraic_to_pos(dst))
+
+    def int_to_move(self,move):
+        """
+        algebraic (src,dst) tuple of a packed move, for moves going out to the GUI or UI
+        """
+        return self.notation[move&63],self.notation[move>>6&63]
+
+    def algebraic_key(self,move):
+        """
+        sort key for a packed move that orders moves the same as their algebraic (src,dst) tuples
+        """
+        return self.notation_order[move&63]<<6|self.notation_order[move>>6&63]
+
     def total_moves(self):
         """
         Count how many total moves there are for the board for current side
@@ -423,7 +681,7 @@ class Board:
         
     def move(self,src,dst):
         """
-        Moves a piece from src to dst (in algebraic), and returns updated board, appends old board to states
+        Moves a piece from src to dst (in algebraic), and returns updated board, adds old position to states
         """
         pos_dst=self.algebraic_to_pos(dst)
         pos_src=self.algebraic_to_pos(src)
@@ -435,40 +693,126 @@ class Board:
         if self.check_piece_color(piece)!=self.turn:
             raise InvalidMoveError("Wrong colour piece")
         # checked for all errors now we can change the state of board
-        castle=False
+        self.make_move(pos_src,pos_dst)
+
+    def castle_squares(self,piece,pos_src,pos_dst):
+        """
+        where the king and rook end up when castling king piece from pos_src with the rook on pos_dst
+        """
+        if piece=="k":
+            #a-side
+            if pos_dst<pos_src:
+                return 58,59
+            #h-side
+            return 62,61
+        if pos_dst<pos_src:
+            return 2,3
+        #h-side
+        return 6,5
+
+    def make_move(self,pos_src,pos_dst,promote_to="q"):
+        """
+        Changes the state of the board for a move that is known to be valid, src and dst as pos,
+        returns the undo record that pop uses to take the move back
+        """
+        piece=self.board[pos_src]
+        captured=self.board[pos_dst]
+        #where the pieces were before the move for threefold repetition, linking to the old history instead of
+        #changing it means copies and searches share it
+        self.states=(self.zobrist,self.states)
+        castle=None
         if piece in ["k","K"]:
-            if pos_src in self.unmoved and pos_dst in self.unmoved:
-                castle=True
-                self.board[pos_src],self.board[pos_dst]=".","."
-                if piece=="k":
-                    #a-side
-                    if pos_dst<pos_src:
-                        self.board[58],self.board[59]="k","r"
-                    #h-side
-                    else:
-                        self.board[62],self.board[61]="k","r"
-                else:
-                    if pos_dst<pos_src:
-                        self.board[2],self.board[3]="K","R"
-                    #h-side
-                    else:
-                        self.board[6],self.board[5]="K","R"  
-        self.unmoved.discard(pos_src)
+            if pos_src in self.unmoved and pos_dst in self.unmoved and captured==("r" if piece=="k" else "R"):
+                king_pos,rook_pos=self.castle_squares(piece,pos_src,pos_dst)
+                #the squares castling writes to and what was on them before
+                castle=((pos_src,piece),(pos_dst,captured),(king_pos,self.board[king_pos]),(rook_pos,self.board[rook_pos]))
+                self.set_square(pos_src,".")
+                self.set_square(pos_dst,".")
+                self.set_square(king_pos,piece)
+                self.set_square(rook_pos,captured)
+        unmoved=pos_src in self.unmoved
+        if unmoved:
+            self.unmoved.discard(pos_src)
+            self.rights_zobrist^=self.zobrist_unmoved[pos_src]
+        enpassant_check=self.enpassant_check
+        move_count=self.move_count
         self.move_count+=1
-        self.states.append(self.board[:]) # copy the board state as a new object
-        if piece=="p" or piece=="P":
+        enpassant_captured=None
+        if len(enpassant_check)>0:
+            if (piece=="p" or piece=="P") and enpassant_check[2]==pos_dst:
+                #taking en passant, the pawn taken is behind dst
+                enpassant_pos=pos_dst+8 if piece=="p" else pos_dst-8
+                enpassant_captured=(enpassant_pos,self.board[enpassant_pos])
+                self.set_square(enpassant_pos,".")
+            #en passant can only be done straight after the pawn moves 2
+            self.rights_zobrist^=self.enpassant_zobrist(enpassant_check)
+            self.enpassant_check=[]
+        if (piece=="p" or piece=="P") and abs(pos_dst-pos_src)==16:
             self.enpassant(pos_dst)
-        if len(self.enpassant_check)>0 and self.enpassant_check[2]==pos_dst:
-            if piece=="p":
-                self.board[pos_dst+8]="."
-            elif piece=="P":
-                self.board[pos_dst-8]="."
-        if not castle:
-            self.board[pos_src]="."
-            self.board[pos_dst]=piece
-        self.promotion(piece,pos_dst)
+        if castle is None:
+            self.set_square(pos_src,".")
+            self.set_square(pos_dst,piece)
+        self.promotion(piece,pos_dst,promote_to)
         #print(self.winlossdraw())
         self.turn=1-self.turn
+        return (pos_src,pos_dst,piece,captured,castle,enpassant_captured,enpassant_check,unmoved,move_count)
+
+    def push(self,move):
+        """
+        Makes move, a (src,dst) tuple in algebraic, without checking it is valid and remembers how to undo it,
+        used by the search so it can walk one board instead of copying it for every node
+        """
+        src,dst=move
+        self.undo_stack.append(self.make_move(self.algebraic_to_pos(src),self.algebraic_to_pos(dst)))
+
+    def move_int(self,move):
+        """
+        push for a packed move, skips the algebraic conversion, take it back with pop
+        """
+        promotion=move>>12&7
+        if promotion:
+            self.undo_stack.append(self.make_move(move&63,move>>6&63,PROMOTION_PIECES[promotion]))
+        else:
+            self.undo_stack.append(self.make_move(move&63,move>>6&63))
+
+    def push_null(self):
+        """
+        passes the turn to the other side without moving, for null move pruning in the search, take it back with pop_null
+        """
+        self.undo_stack.append(self.enpassant_check)
+        self.rights_zobrist^=self.enpassant_zobrist(self.enpassant_check)
+        self.enpassant_check=[]
+        self.turn=1-self.turn
+
+    def pop_null(self):
+        """
+        takes back the last push_null
+        """
+        self.enpassant_check=self.undo_stack.pop()
+        self.rights_zobrist^=self.enpassant_zobrist(self.enpassant_check)
+        self.turn=1-self.turn
+
+    def pop(self):
+        """
+        Takes back the last move made with push
+        """
+        pos_src,pos_dst,piece,captured,castle,enpassant_captured,enpassant_check,unmoved,move_count=self.undo_stack.pop()
+        if castle is None:
+            self.set_square(pos_dst,captured)
+            self.set_square(pos_src,piece)
+        else:
+            for pos,old_piece in castle:
+                self.set_square(pos,old_piece)
+        if enpassant_captured is not None:
+            self.set_square(*enpassant_captured)
+        if unmoved:
+            self.unmoved.add(pos_src)
+            self.rights_zobrist^=self.zobrist_unmoved[pos_src]
+        self.rights_zobrist^=self.enpassant_zobrist(self.enpassant_check)^self.enpassant_zobrist(enpassant_check)
+        self.enpassant_check=enpassant_check
+        self.move_count=move_count
+        self.states=self.states[1]
+        self.turn=1-self.turn
 
     def is_check(self,king_pos,color=None):
         """
@@ -490,14 +834,42 @@ class Board:
                 check_turn=self.WHITE
             else:
                 raise InvalidColorError(f"Not valid color specified: {color}")
-        #check if in check, uses copy of board to see if moved will it be in check
-        copy=self.copy()
-        if check_turn==self.WHITE:
-            copy.board[king_pos]="K"
+        return self.is_square_attacked(king_pos,check_turn)
+
+    def is_square_attacked(self,pos,by):
+        """
+        Checks if any piece of colour by attacks pos, looks outward from pos for pieces that could reach it
+        instead of generating all the moves for the other side
+        """
+        board=self.board
+        if by==self.WHITE:
+            pawn,knight,bishop,rook,queen,king="pnbrqk"
         else:
-            copy.board[king_pos]="k"
-        if king_pos in copy.all_valid_moves(check_turn,checkcheck=False):
-            return True
+            pawn,knight,bishop,rook,queen,king="PNBRQK"
+        for src in self.pawn_squares[by][pos]:
+            if board[src]==pawn:
+                return True
+        for src in self.knight_squares[pos]:
+            if board[src]==knight:
+                return True
+        for src in self.king_squares[pos]:
+            if board[src]==king:
+                return True
+        #first piece along each ray is the only one that can attack
+        for ray in self.straight_rays[pos]:
+            for src in ray:
+                piece=board[src]
+                if piece!=".":
+                    if piece==rook or piece==queen:
+                        return True
+                    break
+        for ray in self.diagonal_rays[pos]:
+            for src in ray:
+                piece=board[src]
+                if piece!=".":
+                    if piece==bishop or piece==queen:
+                        return True
+                    break
         return False
     
     def find_piece_index(self, pos):
@@ -540,12 +912,15 @@ class Board:
         """
         Checks for threefold repetition, forces draw, returns boolean
         """
-        repcount=1
-        for state in self.states:
-            if state==self.board:
-                repcount+=1
-            if repcount>=3:
-                return True
+        #states are the zobrist keys of where the pieces were so this compares ints not boards
+        count=0
+        state=self.states
+        while state is not None:
+            zobrist,state=state
+            if zobrist==self.zobrist:
+                count+=1
+                if count==2:
+                    return True
         return False
     
     def contains(self,pos,piece):
@@ -565,6 +940,7 @@ class Board:
         """
         opp1=self.move_pos(pos,1,0)
         opp2=self.move_pos(pos,-1,0) # adjacent squares
+        self.rights_zobrist^=self.enpassant_zobrist(self.enpassant_check)
         self.enpassant_check=[]
         if self.turn==self.WHITE:
             if self.contains(opp1,"P") or self.contains(opp2,"P"):
@@ -572,91 +948,127 @@ class Board:
         elif self.turn==self.BLACK:
             if self.contains(opp1,"p") or self.contains(opp2,"p"):
                 self.enpassant_check=[opp1,opp2,pos-8]
+        self.rights_zobrist^=self.enpassant_zobrist(self.enpassant_check)
     
-    def promotion(self,piece,dst):
+    def promotion(self,piece,dst,promote_to="q"):
         """
-        if pawn on opposite end becomes queen for simplicity
+        if pawn on opposite end becomes queen for simplicity, promote_to can pick another piece
         """
         if piece=="p" and dst//8==0:
-            self.board[dst]="q"
+            self.set_square(dst,promote_to)
         if piece=="P" and dst//8==7:
-            self.board[dst]="Q"
+            self.set_square(dst,promote_to.upper())
     
+    def has_legal_move(self):
+        """
+        checks if the side to move has any legal move, stops at the first one instead of finding them all
+        """
+        cache_key=self.cache_key(self.turn,True)
+        if cache_key in self.valid_moves_cache:
+            return len(self.valid_moves_cache.get(cache_key))>0
+        for src in self.piece_positions(self.turn):
+            piece=self.board[src]
+            if piece=="k" or piece=="K":
+                #castling is only checked properly with checkcheck
+                if self.moves_from(src,True,self.turn):
+                    return True
+            else:
+                for dst in self.moves_from(src,False,self.turn):
+                    if self.is_move_out_of_check(src,dst):
+                        return True
+        return False
+
+    def status(self):
+        """
+        state of the game in string, same as winlossdraw, whether the side to move has a legal move and
+        is in check is worked out once per position and cached
+        """
+        key=self.hash()
+        cached=self.status_cache.get(key)
+        if cached is None:
+            king_pos=self.kings[self.turn]
+            in_check=king_pos is not None and self.is_square_attacked(king_pos,1-self.turn)
+            cached=(self.has_legal_move(),in_check)
+            self.status_cache.put(key,cached)
+        has_legal_move,in_check=cached
+        if not has_legal_move:
+            if not in_check:
+                return "draw" # stalemate
+            return "white win" if self.turn==self.BLACK else "black win"
+        if self.is_75_move_rule() or self.is_threefold_repetition():
+            return "draw"
+        if in_check:
+            return "black in check" if self.turn==self.BLACK else "white in check"
+        return ""
+
     def winlossdraw(self):
         """
         runs all functions related to win/loss/draw, returns state in string
         """
-        if self.turn==self.BLACK:
-            king_pos=self.find_piece("K")[0]
-            if self.is_checkmate(king_pos):
-                return "white win"
-            elif self.is_stalemate(king_pos):
-                return "draw"
-            elif self.is_75_move_rule():
-                return "draw"
-            elif self.is_threefold_repetition():
-                return "draw"
-            elif self.is_check(king_pos):
-                return "black in check"
-        else:
-            king_pos=self.find_piece("k")[0]
-            if self.is_checkmate(king_pos):
-                return "black win"
-            elif self.is_stalemate(king_pos):
-                return "draw"
-            elif self.is_75_move_rule():
-                return "draw"
-            elif self.is_threefold_repetition():
-                return "draw"
-            elif self.is_check(king_pos):
-                return "white in check"
-        return ""
+        return self.status()
     
     def game_over(self):
         """
         checks if game is over
         """
-        return self.winlossdraw() in ["white win", "draw", "black win"]
+        return self.status() in ["white win", "draw", "black win"]
     
     def copy(self):
         """
         return deep copy of this board without using copy.deepcopy as it's slow
         """
-        copy=Board.__new__(Board) # makes uninitialised board
+        copy=self.__class__.__new__(self.__class__) # makes uninitialised board of the same kind
         #shallow copy class variables
         copy.board=self.board[:]
         copy.turn=self.turn
         copy.move_count=self.move_count
-        copy.states=self.states[:]
+        copy.states=self.states # never changed in place so can be shared
         copy.enpassant_check=self.enpassant_check[:]
         copy.unmoved=self.unmoved.copy()
-        copy.clear_caches()
+        copy.undo_stack=[] # moves pushed on this board can't be popped from the copy
+        copy.zobrist=self.zobrist
+        copy.rights_zobrist=self.rights_zobrist
+        copy.pieces=[self.pieces[0].copy(),self.pieces[1].copy()]
+        copy.kings=self.kings[:]
         return copy
     
     def is_move_out_of_check(self,src,dst):
         """
-        does move on copy of board and sees if still in check
+        tries the move on the board list and sees if the king of the side to move is attacked, then puts the board back
         """
-        board=self.copy()
-        board.board[src],board.board[dst]=".",board.board[src]
-        if board.turn==board.BLACK:
-            king_pos=board.find_piece("K")[0]
+        board=self.board
+        piece,captured=board[src],board[dst]
+        if captured!="." and self.check_piece_color(captured)==self.check_piece_color(piece):
+            #castling, king moves onto its own rook, can_castle has already checked the squares
+            return True
+        colour=self.turn
+        if piece==("k" if colour==self.WHITE else "K"):
+            king_pos=dst
         else:
-            king_pos=board.find_piece("k")[0]
-        return not board.is_check(king_pos)
+            king_pos=self.kings[colour]
+            if king_pos is None or king_pos==dst:
+                #no king or it's being taken
+                return True
+        #straight onto the list rather than set_square as the board is put back before anything else sees it
+        board[src],board[dst]=".",piece
+        enpassant_pos=None
+        if (piece=="p" or piece=="P") and len(self.enpassant_check)>0 and self.enpassant_check[2]==dst:
+            #the pawn taken en passant might have been blocking a check along the row
+            enpassant_pos=dst+8 if piece=="p" else dst-8
+            enpassant_piece=board[enpassant_pos]
+            board[enpassant_pos]="."
+        attacked=self.is_square_attacked(king_pos,1-colour)
+        board[src],board[dst]=piece,captured
+        if enpassant_pos is not None:
+            board[enpassant_pos]=enpassant_piece
+        return not attacked
     
     def valid_move_src_dst(self,turn,checkcheck=True):
-        srcdstlist=[]
-        for i in self.notation:
-            if self.check_piece_color(self.board[self.algebraic_to_pos(i)])!=turn:
-                continue
-            try:
-                new_moves=self.piece_moves(i,checkcheck=checkcheck,turn=turn)
-                for move in new_moves:
-                    srcdstlist.append((i,self.notation[move]))
-            except EmptySquareError as e:
-                print(e)
-        return srcdstlist
+        """
+        Valid moves for colour turn as (src,dst) in algebraic
+        """
+        notation=self.notation
+        return [(notation[move&63],notation[move>>6&63]) for move in self.valid_moves_int(turn,checkcheck)]
     
     def board_to_fen(self):
         """
@@ -0,0 +1,69 @@
+"""
+Least recently used cache, keeps results shared between boards without growing forever
+"""
+
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Dictionary like cache holding at most size entries, when full the entry used longest ago is dropped,
+    counts hits and misses so how useful it is can be seen
+    """
+    def __init__(self,size):
+        self.size=size
+        self.entries=OrderedDict()
+        self.hits=0
+        self.misses=0
+
+    def get(self,key,default=None):
+        """
+        returns the value for key and marks it as recently used, default if it isn't cached
+        """
+        value=self.entries.get(key,default)
+        if value is default:
+            self.misses+=1
+        else:
+            self.entries.move_to_end(key)
+            self.hits+=1
+        return value
+
+    def put(self,key,value):
+        """
+        adds value for key, dropping the least recently used entry if the cache is full
+        """
+        entries=self.entries
+        entries[key]=value
+        entries.move_to_end(key)
+        if len(entries)>self.size:
+            entries.popitem(last=False)
+
+    def resize(self,size):
+        """
+        changes how many entries are kept, dropping the least recently used ones if it shrinks
+        """
+        self.size=size
+        while len(self.entries)>size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        empties the cache and resets the counts
+        """
+        self.entries.clear()
+        self.hits=0
+        self.misses=0
+
+    def hit_rate(self):
+        """
+        fraction of lookups found in the cache
+        """
+        lookups=self.hits+self.misses
+        if lookups==0:
+            return 0
+        return self.hits/lookups
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self,key):
+        return key in self.entries
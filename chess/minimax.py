@@ -13,25 +13,26 @@ class MinimaxBase():
         """
         returns best move at set depth
         """
-        return self.best_move_for_level(self.board,self.depth)[1]
+        board=self.board.copy() # the search walks this copy in place with move_int and pop
+        return board.int_to_move(self.best_move_for_level(board,self.depth)[1])
 
     def best_move_for_level(self,board,depth):
         """
-        returns best move and evaluation, for current level and below until depth 0
+        returns best move (packed int) and evaluation, for current level and below until depth 0
         """
-        movelist=board.valid_move_src_dst(board.turn)
+        movelist=board.valid_moves_int(board.turn)
         bestmovelist=[]
-        for src,dst in movelist:
-            copyboard=board.copy()
-            copyboard.move(src,dst)
+        for move in movelist:
+            board.move_int(move)
             if depth<=1:
-                eval=self.evaluate(copyboard)
+                eval=self.evaluate(board)
             else:
-                eval,move=self.best_move_for_level(copyboard,depth-1)
-            bestmovelist.append((eval,(src,dst)))
+                eval,best=self.best_move_for_level(board,depth-1)
+            board.pop()
+            bestmovelist.append((eval,move))
         # reverse if turn is white, sorts lowest first by default, lowest is best evaluation for black
         # maximises for white, minimises for black
-        bestmovelist.sort(reverse=board.turn==board.WHITE)
+        bestmovelist.sort(key=lambda entry:(entry[0],board.algebraic_key(entry[1])),reverse=board.turn==board.WHITE)
         return bestmovelist[0]
 
 class Minimax(MinimaxBase,SimpleEvaluationMixin):
@@ -40,6 +41,6 @@ class Minimax(MinimaxBase,SimpleEvaluationMixin):
         SimpleEvaluationMixin.__init__(self)
 
 class MinimaxAI(MinimaxBase,AIEvaluationMixin):
-    def __init__(self,board,depth):
+    def __init__(self,board,depth,inference=None):
         MinimaxBase.__init__(self,board,depth)
-        AIEvaluationMixin.__init__(self,"AI/chess5M.keras")
+        AIEvaluationMixin.__init__(self,"AI/chess5M.keras",inference)
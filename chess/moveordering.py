@@ -0,0 +1,83 @@
+"""
+Move ordering for alpha-beta search, the sooner the best move is searched the more of the other moves get cut off
+"""
+
+from chess.board import MOVE_CAPTURE,MOVE_CASTLE
+
+#piece values for ordering takes, the king is only ever the attacker
+ORDER_VALUES={"p":1,"n":3,"b":3,"r":5,"q":9,"k":20,"P":1,"N":3,"B":3,"R":5,"Q":9,"K":20}
+
+#scores moves are sorted by, highest first, takes are worth more than killers and killers more than any history score
+HASH_MOVE_SCORE=1<<30
+TAKE_SCORE=1<<26
+KILLER_SCORES=(1<<25,(1<<25)-1)
+CASTLE_SCORE=1<<24
+
+class MoveOrdering:
+    """
+    Orders moves with the transposition table move first, then takes by most valuable victim and least valuable
+    attacker (MVV-LVA), then the 2 killer moves for the ply (quiet moves that caused a cut off in a sibling),
+    then castling, then the other quiet moves by their history score (how often piece moving to dst caused a cut off)
+    """
+    def __init__(self,max_ply=64):
+        self.max_ply=max_ply
+        self.killers=[[0,0] for i in range(max_ply)]
+        self.history={piece:[0]*64 for piece in ORDER_VALUES}
+
+    def new_search(self):
+        """
+        called before every search, killers are for the last position so cleared
+        history is halved so it follows the new position but keeps what it learnt
+        """
+        for killers in self.killers:
+            killers[0]=killers[1]=0
+        for scores in self.history.values():
+            for dst in range(64):
+                scores[dst]>>=1
+
+    def score(self,board,move,ply,hash_move=0):
+        """
+        how early move should be searched, higher first
+        """
+        if move==hash_move:
+            return HASH_MOVE_SCORE
+        if move&MOVE_CAPTURE:
+            attacker=board.board[move&63]
+            victim=board.board[move>>6&63]
+            #en passant takes onto an empty square
+            victim_value=ORDER_VALUES[victim] if victim!="." else 1
+            return TAKE_SCORE+victim_value*32-ORDER_VALUES[attacker]
+        if move>>12&7:
+            return TAKE_SCORE # promotion
+        if ply<self.max_ply:
+            killers=self.killers[ply]
+            if move==killers[0]:
+                return KILLER_SCORES[0]
+            if move==killers[1]:
+                return KILLER_SCORES[1]
+        if move&MOVE_CASTLE:
+            return CASTLE_SCORE
+        return self.history[board.board[move&63]][move>>6&63]
+
+    def order(self,board,moves,ply,hash_move=0):
+        """
+        returns a new list of moves sorted best first, moves that score the same stay in the order they came
+        """
+        score=self.score
+        return sorted(moves,key=lambda move:score(board,move,ply,hash_move),reverse=True)
+
+    def cut_off(self,board,move,ply,depth):
+        """
+        records that move caused a cut off at ply with depth left to search, call before the move is made
+        only quiet moves are remembered as takes are already ordered first
+        """
+        if move&MOVE_CAPTURE or move>>12&7:
+            return
+        if ply<self.max_ply:
+            killers=self.killers[ply]
+            if killers[0]!=move:
+                killers[1]=killers[0]
+                killers[0]=move
+        #deeper cut offs save more searching
+        scores=self.history[board.board[move&63]]
+        scores[move>>6&63]=min(scores[move>>6&63]+depth*depth,CASTLE_SCORE-1)
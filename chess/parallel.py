@@ -0,0 +1,197 @@
+"""
+Parallel search in worker processes as threads don't run python code at the same time, either the root moves
+are split between the workers or every worker searches the whole tree sharing a transposition table (Lazy SMP)
+each process keeps its own search engine so its tables stay warm between moves
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Value,RawValue
+
+#the engine and shared bound of this worker process, set up once by init_root_worker
+worker_engine=None
+worker_bound=None
+
+def init_root_worker(engine_class,options,bound):
+    """
+    runs once in every worker process, makes an engine of the same kind as the one that started the search
+    """
+    global worker_engine,worker_bound
+    options=dict(options,parallel=False)
+    worker_engine=engine_class(None,None,**options)
+    worker_bound=bound
+
+def search_root_move(board,move,depth,root_depth,deadline):
+    """
+    searches root move on board to depth with the window from the best score found so far by any worker,
+    returns (eval,move,evaluations,quiescence nodes), a better score is shared with the other workers
+    """
+    engine=worker_engine
+    engine.count=0
+    engine.quiescence_count=0
+    engine.leaf_evals.clear()
+    engine.root_depth=root_depth
+    engine.deadline=deadline
+    white=board.turn==board.WHITE
+    bound=worker_bound.value
+    board.move_int(move)
+    #moves worse than the best so far only need to be shown to be worse
+    if white:
+        eval,reply=engine.best_move_for_level(board,depth-1,bound,1000)
+    else:
+        eval,reply=engine.best_move_for_level(board,depth-1,-1000,bound)
+    board.pop()
+    with worker_bound.get_lock():
+        if (eval>worker_bound.value if white else eval<worker_bound.value):
+            worker_bound.value=eval
+    return eval,move,engine.count,engine.quiescence_count
+
+class RootSplitter:
+    """
+    pool of worker processes for splitting the root moves of engine's search, the first root move is searched
+    by the engine itself to get a bound, then the rest are shared out with the bound kept in shared memory
+    """
+    def __init__(self,engine,workers=None):
+        self.workers=workers or os.cpu_count()
+        self.bound=Value("d",0)
+        self.pool=ProcessPoolExecutor(self.workers,initializer=init_root_worker,
+                                      initargs=(engine.__class__,engine.options,self.bound))
+
+    def search(self,engine,board,depth,movelist):
+        """
+        searches movelist (best first) from board to depth, returns list of (eval,move) for every move
+        """
+        board.move_int(movelist[0])
+        eval,reply=engine.best_move_for_level(board,depth-1,-1000,1000)
+        board.pop()
+        results=[(eval,movelist[0])]
+        self.bound.value=eval
+        futures=[self.pool.submit(search_root_move,board,move,depth,engine.root_depth,engine.deadline) for move in movelist[1:]]
+        try:
+            for future in futures:
+                eval,move,count,quiescence_count=future.result()
+                engine.count+=count
+                engine.quiescence_count+=quiescence_count
+                results.append((eval,move))
+        except BaseException:
+            #out of time or stopped, nothing else is needed from this search
+            for future in futures:
+                future.cancel()
+            raise
+        return results
+
+    def close(self):
+        """
+        shuts down the worker processes
+        """
+        self.pool.shutdown(cancel_futures=True)
+
+def init_smp_worker(engine_class,options,table,stop):
+    """
+    runs once in every Lazy SMP worker process, makes an engine that uses the shared transposition table
+    """
+    global worker_engine
+    #the engine's own table is never used so is made as small as possible
+    options=dict(options,parallel=False,tt_size=1)
+    worker_engine=engine_class(None,None,**options)
+    worker_engine.tt=table
+    worker_engine.stop=stop
+
+def smp_search(board,depth,root_depth,deadline):
+    """
+    searches board to depth until finished or told to stop, only what it leaves in the shared transposition
+    table is used, returns the number of positions it looked at
+    """
+    from chess.alphabetapruning import SearchTimeout
+    engine=worker_engine
+    engine.count=0
+    engine.quiescence_count=0
+    engine.leaf_evals.clear() # a search that was stopped can leave some behind
+    engine.root_depth=root_depth
+    engine.deadline=deadline
+    try:
+        engine.best_move_for_level(board,depth,-1000,1000)
+    except SearchTimeout:
+        pass
+    return engine.count+engine.quiescence_count
+
+class LazySMP:
+    """
+    Lazy SMP, the engine searches the root itself while helper processes search the same position, half of
+    them a ply deeper, filling the shared transposition table with results the engine then doesn't have to search
+    when the engine finishes the helpers are stopped and the engine's result is used
+    node_counts has the positions each worker looked at since reset_stats, the engine first
+    """
+    def __init__(self,engine,workers=None):
+        self.workers=workers or os.cpu_count()
+        self.stop=RawValue("b",0)
+        self.pool=ProcessPoolExecutor(max(self.workers-1,1),initializer=init_smp_worker,
+                                      initargs=(engine.__class__,engine.options,engine.tt,self.stop))
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        sets the node counts and time back to 0
+        """
+        self.node_counts=[0]*self.workers
+        self.time=0
+
+    def search(self,engine,board,depth):
+        """
+        searches board to depth with every worker, returns the engine's evaluation and best move
+        """
+        start=time.time()
+        nodes=engine.count+engine.quiescence_count
+        self.stop.value=0
+        #odd helpers a ply deeper so the workers don't all search the same nodes in the same order
+        #the board is sent in the background so a copy is sent as the engine's search changes board
+        futures=[self.pool.submit(smp_search,board.copy(),depth+i%2,engine.root_depth+i%2,engine.deadline)
+                 for i in range(1,self.workers)]
+        try:
+            return engine.best_move_for_level(board,depth,-1000,1000)
+        finally:
+            self.stop.value=1
+            self.node_counts[0]+=engine.count+engine.quiescence_count-nodes
+            for i,future in enumerate(futures,1):
+                self.node_counts[i]+=future.result()
+            self.time+=time.time()-start
+
+    def nodes_per_second(self):
+        """
+        positions looked at per second by all the workers together
+        """
+        if self.time==0:
+            return 0
+        return sum(self.node_counts)/self.time
+
+    def close(self):
+        """
+        shuts down the worker processes
+        """
+        self.pool.shutdown(cancel_futures=True)
+
+def scaling(fen,depth,workers=(1,2,4,8,16),engine_class=None):
+    """
+    searches fen to depth with Lazy SMP for each number of workers, prints and returns the node counts,
+    nodes per second and time so how the search scales with cores can be seen
+    """
+    from chess.bitboard import BitBoard
+    from chess.alphabetapruning import AlphabetaPruning
+    engine_class=engine_class or AlphabetaPruning
+    results=[]
+    for n in workers:
+        engine=engine_class(BitBoard.from_fen(fen),depth,parallel="smp",workers=n)
+        try:
+            start=time.time()
+            move=engine.best_move()
+            dt=time.time()-start
+            print(f"workers {n:2} move {move} nodes {engine.pool.node_counts} nodes/s {engine.pool.nodes_per_second():9.0f} time {dt:7.3f}")
+            results.append((n,move,list(engine.pool.node_counts),engine.pool.nodes_per_second(),dt))
+        finally:
+            engine.close()
+    return results
+
+if __name__=="__main__":
+    from chess.perft import POSITIONS
+    scaling(POSITIONS[1][1],4)
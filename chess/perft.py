@@ -0,0 +1,93 @@
+"""
+Perft, counts the positions at the end of every line of play to a given depth, the counts for the
+standard test positions are known so this checks the move generator and measures how fast it is
+"""
+
+import random
+import time
+from chess.board import Board
+from chess.bitboard import BitBoard
+
+#name, fen and known node counts by depth
+#the engine only promotes to queens so the depths stop before the standard counts include other promotions
+POSITIONS=[
+    ("start","rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -",{1:20,2:400,3:8902,4:197281}),
+    ("kiwipete","r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -",{1:48,2:2039,3:97862}),
+    ("position 3","8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -",{1:14,2:191,3:2812,4:43238}),
+    ("position 4","r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq -",{1:6}),
+    ("position 6","r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - -",{1:46,2:2079,3:89890}),
+]
+
+def perft(board,depth):
+    """
+    number of positions reached after depth moves from board, the moves are made and taken back with move_int and pop
+    """
+    moves=board.valid_moves_int(board.turn)
+    if depth<=1:
+        return len(moves) if depth==1 else 1
+    nodes=0
+    for move in moves:
+        board.move_int(move)
+        nodes+=perft(board,depth-1)
+        board.pop()
+    return nodes
+
+def divide(board,depth):
+    """
+    perft split by first move, returns dict of algebraic move to count, for finding which move a wrong count comes from
+    """
+    counts={}
+    for move in board.valid_moves_int(board.turn):
+        board.move_int(move)
+        counts[board.int_to_move(move)]=perft(board,depth-1)
+        board.pop()
+    return counts
+
+def timed_perft(board,depth):
+    """
+    returns perft count and nodes per second
+    """
+    #the move cache is shared by every board so positions generated before would only time cache hits
+    board.clear_caches()
+    start=time.time()
+    nodes=perft(board,depth)
+    dt=time.time()-start
+    return nodes,nodes/dt if dt>0 else 0
+
+def run_suite(board_class=BitBoard,max_depth=4,chess960_count=3,seed=960):
+    """
+    runs every position up to max_depth against its known count, then chess 960 starts from Board.randomize960
+    where Board and board_class have to agree, returns True if every count was right
+    """
+    okay=True
+    for name,fen,counts in POSITIONS:
+        for depth,expected in sorted(counts.items()):
+            if depth>max_depth:
+                break
+            nodes,nps=timed_perft(board_class.from_fen(fen),depth)
+            result="ok" if nodes==expected else f"WRONG expected {expected}"
+            okay=okay and nodes==expected
+            print(f"{name:12} depth {depth} nodes {nodes:8} {nps:9.0f} nodes/s {result}")
+    random.seed(seed)
+    for i in range(chess960_count):
+        startposition=Board.randomize960()
+        name="960 "+startposition[:8]
+        #no move at depth 1 changes the other side's moves so depth 2 is depth 1 squared
+        expected=None
+        for depth in range(1,max_depth):
+            nodes,nps=timed_perft(board_class(startposition,chess960=True),depth)
+            board=Board(startposition,chess960=True)
+            if depth==1:
+                expected=nodes*nodes
+                result="ok" if nodes==perft(board,depth) else "WRONG differs from Board"
+            elif depth==2:
+                result="ok" if nodes==expected else f"WRONG expected {expected}"
+            else:
+                expected=perft(board,depth)
+                result="ok" if nodes==expected else f"WRONG Board gives {expected}"
+            okay=okay and result=="ok"
+            print(f"{name:12} depth {depth} nodes {nodes:8} {nps:9.0f} nodes/s {result}")
+    return okay
+
+if __name__=="__main__":
+    run_suite()
@@ -0,0 +1,160 @@
+"""
+Principal variation search, alpha-beta that searches the first move with the full window and checks the other
+moves can't do better with a null window, only searching them properly if they can
+"""
+
+from chess.SimpleEvaluationMixin import SimpleEvaluationMixin
+from chess.AIEvaluationMixin import AIEvaluationMixin
+from chess.alphabetapruning import AlphabetaPruningBase,AlphabetaPruning,SearchTimeout,NULL_WINDOW
+from chess.transpositiontable import EXACT,LOWER,UPPER
+import time
+
+class PVSBase(AlphabetaPruningBase):
+    """
+    Base class for PVS, deepens one ply at a time and starts each iteration with an aspiration window around
+    the last evaluation, searching again with a wider window if the score falls outside it
+    unlike AlphabetaPruningBase a score equal to the edge of the window cuts off
+    """
+    iterative=True
+    aspiration_window=1 # half width of the first aspiration window
+
+    def __init__(self,board,depth,**options):
+        #search_root does its own aspiration windows so never hands the root to a pool of workers
+        if options.get("parallel",False):
+            raise ValueError("PVS doesn't do parallel search")
+        AlphabetaPruningBase.__init__(self,board,depth,**options)
+        #the null window search here doesn't do null moves or late move reductions
+        self.use_null_move=False
+        self.use_late_move_reductions=False
+        self.researches=0
+        self.aspiration_researches=0
+
+    def best_move(self,time_limit=None,max_depth=None):
+        """
+        returns best move, see AlphabetaPruningBase.best_move
+        """
+        self.researches=0
+        self.aspiration_researches=0
+        move=AlphabetaPruningBase.best_move(self,time_limit,max_depth)
+        print(f"PVS re-searches: {self.researches}, Aspiration re-searches: {self.aspiration_researches}")
+        return move
+
+    def search_root(self,board,depth,previous):
+        """
+        searches the root with a window around previous, widening it each time the score lands outside
+        """
+        if previous is None:
+            return self.best_move_for_level(board,depth,-1000,1000)
+        delta=self.aspiration_window
+        while True:
+            alpha,beta=max(previous-delta,-1000),min(previous+delta,1000)
+            eval,move=self.best_move_for_level(board,depth,alpha,beta)
+            if (eval<=alpha and alpha>-1000) or (eval>=beta and beta<1000):
+                #only a bound, the real score is outside the window
+                self.aspiration_researches+=1
+                delta*=4
+                continue
+            return eval,move
+
+    def best_move_for_level(self,board,depth,alpha,beta):
+        """
+        returns best move (packed int) and evaluation, for current level and below until depth 0
+        """
+        if depth==0:
+            self.count+=1
+            if self.use_quiescence:
+                return self.quiescence(board,alpha,beta,0),None
+            return self.leaf_evaluate(board),None
+        if (self.deadline is not None and time.time()>self.deadline) or (self.stop is not None and self.stop.value):
+            raise SearchTimeout()
+        key=board.hash()
+        alpha_orig,beta_orig=alpha,beta
+        tt_move=0
+        entry=self.tt.probe(key)
+        if entry is not None:
+            tt_depth,tt_score,tt_bound,tt_move=entry
+            #the root is always searched so there is a move to return
+            if tt_depth>=depth and depth<self.root_depth:
+                if tt_bound==EXACT or (tt_bound==LOWER and tt_score>=beta) or (tt_bound==UPPER and tt_score<=alpha):
+                    self.tt.cutoffs+=1
+                    return tt_score,tt_move or None
+        ply=self.root_depth-depth
+        movelist=self.sort_moves(board,board.valid_moves_int(board.turn),ply,tt_move)
+        if len(movelist)==0:
+            self.count+=1
+            return self.evaluate(board),None
+        white=board.turn==board.WHITE
+        best_eval,best_move=None,None
+        for i,move in enumerate(movelist):
+            if depth==1 and i==1:
+                #the first move didn't cut off so the rest are likely all needed
+                self.prefetch_leaves(board,movelist[1:])
+            board.move_int(move)
+            if best_move is None:
+                eval,reply=self.best_move_for_level(board,depth-1,alpha,beta)
+            elif white:
+                #can this move get above alpha
+                eval,reply=self.best_move_for_level(board,depth-1,alpha,alpha+NULL_WINDOW)
+                if alpha<eval<beta:
+                    self.researches+=1
+                    eval,reply=self.best_move_for_level(board,depth-1,eval,beta)
+            else:
+                #can this move get below beta
+                eval,reply=self.best_move_for_level(board,depth-1,beta-NULL_WINDOW,beta)
+                if alpha<eval<beta:
+                    self.researches+=1
+                    eval,reply=self.best_move_for_level(board,depth-1,alpha,eval)
+            board.pop()
+            if best_move is None or (eval>best_eval if white else eval<best_eval):
+                best_eval,best_move=eval,move
+            if white: #maximising player
+                if eval>=beta:
+                    self.ordering.cut_off(board,move,ply,depth)
+                    break #beta cut off
+                alpha=max(alpha,eval)
+            else: #minimising player
+                if eval<=alpha:
+                    self.ordering.cut_off(board,move,ply,depth)
+                    break #alpha cut off
+                beta=min(beta,eval)
+        if depth==1:
+            self.leaf_evals.clear() # only meant for this node's children
+        if best_eval<=alpha_orig:
+            bound=UPPER
+        elif best_eval>=beta_orig:
+            bound=LOWER
+        else:
+            bound=EXACT
+        self.tt.store(key,depth,best_eval,bound,best_move)
+        return best_eval,best_move
+
+class PVS(PVSBase,SimpleEvaluationMixin):
+    def __init__(self,board,depth,**options):
+        PVSBase.__init__(self,board,depth,**options)
+
+class PVSAI(PVSBase,AIEvaluationMixin):
+    def __init__(self,board,depth,inference=None,**options):
+        PVSBase.__init__(self,board,depth,**options)
+        self.options["inference"]=inference
+        AIEvaluationMixin.__init__(self,"AI/chess5M.keras",inference)
+
+def compare(fens,depth,searches=(AlphabetaPruning,PVS)):
+    """
+    runs each search on each position to depth, prints and returns the moves, node counts and times
+    """
+    from chess.bitboard import BitBoard
+    results=[]
+    for fen in fens:
+        for search in searches:
+            engine=search(BitBoard.from_fen(fen),depth)
+            start=time.time()
+            move=engine.best_move()
+            dt=time.time()-start
+            nodes=engine.count+engine.quiescence_count
+            print(f"{search.__name__:16} {fen.split()[0]:60} move {move} nodes {nodes:8} time {dt:7.3f}")
+            results.append((search.__name__,fen,move,nodes,dt))
+    return results
+
+if __name__=="__main__":
+    from chess.perft import POSITIONS
+    compare([fen for name,fen,counts in POSITIONS],3)
@@ -0,0 +1,160 @@
+"""
+Transposition table, remembers the result of searching a position so reaching it again through a
+different move order doesn't search it again
+"""
+
+import struct
+
+#bound types, what the stored score says about the real score of the position
+EXACT=0
+LOWER=1 # real score is at least the stored score, the search cut off
+UPPER=2 # real score is at most the stored score, no move got inside the window
+
+class TranspositionTable:
+    """
+    Fixed size table indexed by the low bits of the zobrist hash, each slot keeps the full hash to tell
+    positions sharing a slot apart (0 for an empty slot), the depth searched, the score, the bound type and the best move (packed int, 0 for none)
+    replace is "depth" to keep the deeper search when two positions want the same slot or "always" to keep the newest
+    """
+    def __init__(self,size=2**18,replace="depth"):
+        if replace not in ("depth","always"):
+            raise ValueError(f"Not a valid replacement policy: {replace}")
+        self.size=size
+        self.replace=replace
+        #parallel lists rather than a list of tuples so a slot is overwritten without making a new object
+        self.keys=[0]*size
+        self.depths=[0]*size
+        self.scores=[0]*size
+        self.bounds=[EXACT]*size
+        self.moves=[0]*size
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        sets the counts back to 0, done at the start of every search
+        """
+        self.probes=0
+        self.hits=0
+        self.cutoffs=0
+        self.stores=0
+
+    def probe(self,key):
+        """
+        returns (depth,score,bound,move) stored for the position with zobrist hash key, None if it isn't stored
+        """
+        self.probes+=1
+        index=key%self.size
+        if self.keys[index]!=key:
+            return None
+        self.hits+=1
+        return self.depths[index],self.scores[index],self.bounds[index],self.moves[index]
+
+    def store(self,key,depth,score,bound,move):
+        """
+        stores the result of searching the position with zobrist hash key, unless the replacement policy
+        keeps what is already in the slot
+        """
+        index=key%self.size
+        old_key=self.keys[index]
+        if self.replace=="depth" and old_key!=0 and old_key!=key and self.depths[index]>depth:
+            return
+        self.stores+=1
+        self.keys[index]=key
+        self.depths[index]=depth
+        self.scores[index]=score
+        self.bounds[index]=bound
+        self.moves[index]=move or 0
+
+    def clear(self):
+        """
+        empties the table
+        """
+        for i in range(self.size):
+            self.keys[i]=0
+        self.reset_stats()
+
+    def hit_rate(self):
+        """
+        fraction of probes that found the position
+        """
+        if self.probes==0:
+            return 0
+        return self.hits/self.probes
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Transposition table in shared memory so worker processes searching at the same time can use each others
+    results, each slot is 3 64 bit words: a check word, the depth, bound and move packed together and the score
+    there is no lock, the check word is the key xored with the other 2 words so a slot half written by another
+    process doesn't match its key and is treated as empty
+    name attaches to a table another process made, without it a new table is made
+    """
+    def __init__(self,size=2**18,replace="depth",name=None):
+        if replace not in ("depth","always"):
+            raise ValueError(f"Not a valid replacement policy: {replace}")
+        self.size=size
+        self.replace=replace
+        from multiprocessing import shared_memory # only paid for by Lazy SMP
+        self.owner=name is None # the process that made the table removes it
+        if self.owner:
+            self.memory=shared_memory.SharedMemory(create=True,size=size*24)
+            self.memory.buf[:]=bytes(size*24)
+        else:
+            self.memory=shared_memory.SharedMemory(name=name)
+        #the same memory seen as unsigned ints and as floats
+        self.words=self.memory.buf.cast("Q")
+        self.floats=self.memory.buf.cast("d")
+        self.reset_stats()
+
+    def __reduce__(self):
+        #other processes attach to the same memory rather than copying it
+        return SharedTranspositionTable,(self.size,self.replace,self.memory.name)
+
+    def probe(self,key):
+        """
+        returns (depth,score,bound,move) stored for the position with zobrist hash key, None if it isn't stored
+        """
+        self.probes+=1
+        index=key%self.size*3
+        words=self.words
+        data=words[index+1]
+        #the score is read once so the one returned is the one the check word was matched against
+        bits=words[index+2]
+        if words[index]^data^bits!=key:
+            return None
+        self.hits+=1
+        return data&255,struct.unpack("d",struct.pack("Q",bits))[0],data>>8&3,data>>10
+
+    def store(self,key,depth,score,bound,move):
+        """
+        stores the result of searching the position with zobrist hash key, unless the replacement policy
+        keeps what is already in the slot
+        """
+        index=key%self.size*3
+        words=self.words
+        data=words[index+1]
+        old_key=words[index]^data^words[index+2]
+        if self.replace=="depth" and old_key!=0 and old_key!=key and data&255>depth:
+            return
+        self.stores+=1
+        data=depth|bound<<8|(move or 0)<<10
+        words[index+1]=data
+        self.floats[index+2]=score
+        words[index]=key^data^words[index+2]
+
+    def clear(self):
+        """
+        empties the table
+        """
+        self.memory.buf[:]=bytes(self.size*24)
+        self.reset_stats()
+
+    def close(self):
+        """
+        detaches from the shared memory, the process that made the table also frees it
+        """
+        self.words.release()
+        self.floats.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -1,8 +1,10 @@
 import sys
 import pygame
 from chess import UI
+from chess.bitboard import BitBoard
 from chess.minimax import Minimax,MinimaxAI
 from chess.alphabetapruning import AlphabetaPruning,AlphabetaPruningAI
+from chess.pvs import PVS,PVSAI
 import time
 
 class GUI:
@@ -34,7 +36,7 @@ class GUI:
     
     def __init__(self):
         pygame.init()
-        self.board=UI.Board(chess960=False)
+        self.board=BitBoard(chess960=False)
         self.screen = pygame.display.set_mode((self.screen_width,self.screen_height))
         pygame.display.set_caption("DOUGAL CHESS GUI")
         self.image_list=[]
@@ -45,6 +47,7 @@ class GUI:
         self.status=""
         self.players=[AlphabetaPruningAI,None] # [black,white]
         self.depth=2
+        self.time_limit=None # seconds per engine move, searches deeper until it runs out instead of to depth
         self.drag=False
         self.drag_image=None
         self.offset_x,self.offset_y=0,0
@@ -57,16 +60,18 @@ class GUI:
         self.players[1]=self.choose_player("White")
         self.players[0]=self.choose_player("Black")
         if self.players[1] is not None or self.players[0] is not None:
-            self.depth=self.menu("Depth?",[
-                ["Depth 1",1],
-                ["Depth 2",2],
-                ["Depth 3",3],
+            self.depth,self.time_limit=self.menu("Depth?",[
+                ["Depth 1",(1,None)],
+                ["Depth 2",(2,None)],
+                ["Depth 3",(3,None)],
+                ["1 second a move",(None,1)],
+                ["5 seconds a move",(None,5)],
             ])
         chess960=self.menu("Chess 960?",[
             ["Yes",True],
             ["No",False]
         ])
-        self.board=UI.Board(chess960=chess960)
+        self.board=BitBoard(chess960=chess960)
         self.draw_board()
         pygame.display.flip()
         while self.run:
@@ -92,7 +97,9 @@ class GUI:
         return self.menu(f"Choose {colour} Player",[
             ["Human",None],
             ["Computer no AI", AlphabetaPruning],
-            ["Computer with AI", AlphabetaPruningAI]
+            ["Computer with AI", AlphabetaPruningAI],
+            ["Computer no AI (PVS)", PVS],
+            ["Computer with AI (PVS)", PVSAI]
         ])
     
     def menu(self,heading,options):
@@ -123,7 +130,7 @@ class GUI:
         """
         if not is_human:
             m=player(self.board,self.depth)
-            self.src,self.dst=m.best_move()
+            self.src,self.dst=m.best_move(time_limit=self.time_limit)
         if self.src is not None:
             try:
                 self.board.move(self.src,self.dst)
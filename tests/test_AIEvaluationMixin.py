@@ -4,6 +4,9 @@ SimpleEvaluationMixin unit test
 
 from chess.AIEvaluationMixin import *
 from chess import board
+import numpy as np
+import os
+import tempfile
 import unittest
 
 class test_AIEvaluationMixin(unittest.TestCase):
@@ -125,6 +128,61 @@ class test_AIEvaluationMixin(unittest.TestCase):
         print(e.evaluate(b))
         self.assertAlmostEqual(14,e.evaluate(b),delta=1)
 
+    def test_evaluate_batch(self):
+        e=AIEvaluationMixin("AI/chess5M.keras")
+        e.batch_size=2
+        boards=[board.Board.from_fen(fen) for fen in ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -",
+                                                      "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -",
+                                                      "7k/6Q1/6K1/8/8/8/8/8 b - -", # checkmate
+                                                      "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -")]
+        evals=e.evaluate_batch(boards)
+        self.assertEqual(4,len(evals))
+        self.assertEqual(1000,evals[2])
+        for b,eval in zip(boards,evals):
+            self.assertAlmostEqual(e.evaluate(b),eval,places=3)
+        self.assertEqual([],e.evaluate_batch([]))
+
+    def test_load_model(self):
+        #loaded once and shared, the inference function is traced once for every batch size
+        e=AIEvaluationMixin("AI/chess5M.keras")
+        other=AIEvaluationMixin("AI/chess5M.keras")
+        self.assertIs(e.model,other.model)
+        self.assertIs(e.infer,other.infer)
+        self.assertIs(e.model,load_model("AI/chess5M.keras")[0])
+        for n in (1,3,64):
+            self.assertEqual((n,1),tuple(e.infer(np.zeros((n,8,8,13),dtype=np.float32)).shape))
+        self.assertEqual(1,e.infer.experimental_get_tracing_count())
+
+    def test_eval_cache(self):
+        e=AIEvaluationMixin("AI/chess5M.keras")
+        e.eval_cache.clear()
+        b=board.Board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -")
+        key=b.hash()
+        eval=e.evaluate(b)
+        self.assertEqual(1,e.eval_cache.misses)
+        self.assertEqual(eval,e.evaluate(b))
+        self.assertEqual(1,e.eval_cache.hits)
+        #shared with other engines using the model, and by evaluate_batch
+        other=AIEvaluationMixin("AI/chess5M.keras")
+        self.assertIs(e.eval_cache,other.eval_cache)
+        b2=board.Board.from_fen("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -")
+        self.assertEqual([eval,e.evaluate(b2)],other.evaluate_batch([b,b2]))
+        self.assertEqual(2,len(e.eval_cache))
+        #the side to move is part of the key
+        b.turn=b.BLACK
+        b.rehash()
+        self.assertNotEqual(eval,e.evaluate(b))
+        #saved and loaded
+        with tempfile.TemporaryDirectory() as folder:
+            path=os.path.join(folder,"evals")
+            e.save_eval_cache(path)
+            e.eval_cache.clear()
+            self.assertEqual(3,e.load_eval_cache(path))
+            self.assertEqual(eval,e.eval_cache.get(key))
+            self.assertIn(b2.hash(),e.eval_cache)
+            e.model_file="another.keras"
+            self.assertEqual(0,e.load_eval_cache(path))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -59,5 +59,11 @@ class test_SimpleEvaluationMixin(unittest.TestCase):
                 "rnbqkbnr")
         self.assertEqual(-6,e.evaluate(b))
 
+    def test_evaluate_batch(self):
+        e=SimpleEvaluationMixin()
+        boards=[board.Board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -"),
+                board.Board.from_fen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNB1KBNR w KQkq -")]
+        self.assertEqual([e.evaluate(b) for b in boards],e.evaluate_batch(boards))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
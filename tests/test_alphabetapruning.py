@@ -95,7 +95,145 @@ class test_alphabetapruning(unittest.TestCase):
         m=AlphabetaPruningAI(b,3)
         #mate in 2
         self.assertEqual(('e3', 'e2'),m.best_move())
-        
+
+    def test_quiescence(self):
+        #the pawn on d5 is guarded so taking it loses the queen
+        b=board.Board(".......K"
+                "........"
+                "....P..."
+                "...P...."
+                "........"
+                "........"
+                "........"
+                "...q...k")
+        m=AlphabetaPruning(b,1,quiescence=False)
+        self.assertEqual(("d1","d5"),m.best_move())
+        self.assertEqual(0,m.quiescence_count)
+        m=AlphabetaPruning(b,1)
+        self.assertNotEqual(("d1","d5"),m.best_move())
+        self.assertGreater(m.quiescence_count,0)
+        #looking at every way out of check finds the same
+        m=AlphabetaPruning(b,1,quiescence_evasions=True)
+        self.assertNotEqual(("d1","d5"),m.best_move())
+
+    def test_forward_pruning(self):
+        b=board.Board.from_fen("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - -")
+        m=AlphabetaPruning(b,4)
+        m.best_move()
+        self.assertGreater(m.null_move_tries,0)
+        self.assertGreater(m.reductions,0)
+        #each can be turned off
+        m=AlphabetaPruning(b,4,null_move=False,late_move_reductions=False)
+        m.best_move()
+        self.assertEqual(0,m.null_move_tries)
+        self.assertEqual(0,m.reductions)
+        #only pawns and king can't pass as that could be zugzwang
+        b=board.Board.from_fen("8/5k2/4p3/4P3/8/8/5K2/8 w - -")
+        m=AlphabetaPruning(b,4)
+        self.assertFalse(m.null_move_allowed(b,4,False))
+        m.best_move()
+        self.assertEqual(0,m.null_move_tries)
+        b=board.Board.from_fen("8/5k2/4p3/4P3/8/8/5K2/6N1 w - -")
+        self.assertTrue(m.null_move_allowed(b,4,False))
+        self.assertFalse(m.null_move_allowed(b,4,True))
+        self.assertFalse(m.null_move_allowed(b,2,False))
+
+    def test_time_limit(self):
+        b=board.Board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -")
+        #deepening to a depth in plenty of time gives the same move as searching straight to it
+        m=AlphabetaPruning(b,3)
+        self.assertEqual(AlphabetaPruning(b,3).best_move(),m.best_move(time_limit=1000))
+        self.assertEqual(3,m.root_depth)
+        #stops when the time runs out with the move from the last finished depth
+        m=AlphabetaPruning(b,None)
+        start=time.time()
+        move=m.best_move(time_limit=0.5)
+        self.assertLess(time.time()-start,2)
+        self.assertIn(move,b.valid_move_src_dst(b.turn))
+        #a win is found without going any deeper
+        b=board.Board(".......K"
+                "........"
+                "........"
+                "........"
+                "........"
+                "....RR.."
+                "........"
+                "k.......")
+        b.turn=b.BLACK
+        m=AlphabetaPruning(b,None)
+        self.assertEqual(('e3', 'e2'),m.best_move(time_limit=1000,max_depth=6))
+        self.assertEqual(3,m.root_depth)
+
+    def test_parallel(self):
+        #splitting the root moves between processes finds the same move and evaluation as searching them in turn
+        for fen in ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -",
+                    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -",
+                    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 b - -"):
+            b=board.Board.from_fen(fen)
+            serial=AlphabetaPruning(b,3,null_move=False,late_move_reductions=False)
+            parallel=AlphabetaPruning(b,3,null_move=False,late_move_reductions=False,parallel="root",workers=2)
+            try:
+                self.assertEqual(serial.best_move(),parallel.best_move())
+                self.assertEqual(serial.search_root(b,3,None)[0],parallel.search_root(b,3,None)[0])
+            finally:
+                parallel.close()
+        self.assertIsNone(parallel.pool)
+
+    def test_lazy_smp(self):
+        b=board.Board.from_fen("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -")
+        m=AlphabetaPruning(b,3,parallel="smp",workers=2)
+        try:
+            self.assertIn(m.best_move(),b.valid_move_src_dst(b.turn))
+            self.assertEqual(2,len(m.pool.node_counts))
+            self.assertEqual(m.count+m.quiescence_count,m.pool.node_counts[0])
+            self.assertGreater(m.pool.nodes_per_second(),0)
+        finally:
+            m.close()
+        #the helpers don't change a forced win
+        b=board.Board(".......K"
+                "........"
+                "........"
+                "........"
+                "........"
+                "....RR.."
+                "........"
+                "k.......")
+        b.turn=b.BLACK
+        b.rehash()
+        m=AlphabetaPruning(b,3,parallel="smp",workers=3)
+        try:
+            self.assertEqual(('e3', 'e2'),m.best_move())
+        finally:
+            m.close()
+        self.assertRaises(ValueError,AlphabetaPruning,b,3,parallel="threads")
+
+    def test_batch(self):
+        #evaluating the leaves under depth 1 nodes together finds the same move with the same number of evaluations
+        b=board.Board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -")
+        single=AlphabetaPruningAI(b,2,batch_size=1)
+        batched=AlphabetaPruningAI(b,2,batch_size=16)
+        self.assertEqual(16,batched.batch_size)
+        self.assertEqual(single.best_move(),batched.best_move())
+        self.assertEqual(single.count,batched.count)
+        self.assertEqual(1,AlphabetaPruning(b,2).batch_size)
+
+    def test_leaf_evals_cleared(self):
+        #evaluations left from an earlier search aren't used by the next one
+        b=board.Board.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -")
+        fresh=AlphabetaPruning(b,2,quiescence=False,batch_size=16)
+        move=fresh.best_move()
+        self.assertEqual({},fresh.leaf_evals)
+        m=AlphabetaPruning(b,2,quiescence=False,batch_size=16)
+        for first in b.valid_moves_int(b.turn):
+            b.move_int(first)
+            for second in b.valid_moves_int(b.turn):
+                b.move_int(second)
+                m.leaf_evals[b.hash()]=-1000
+                b.pop()
+            b.pop()
+        self.assertEqual(move,m.best_move())
+        self.assertEqual(fresh.count,m.count)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
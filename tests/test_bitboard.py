@@ -0,0 +1,133 @@
+"""
+Unit Test for BitBoard class
+"""
+
+import unittest
+from chess.board import Board
+from chess.bitboard import *
+
+class TestBitBoard(unittest.TestCase):
+    positions=[Board.startposition,
+               ("R...K..R"
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                "p......."
+                "r...kq.."),
+               ("RNB.KBNR"
+                "PPPP.PPP"
+                "....P..."
+                "........"
+                "......pQ"
+                ".....p.."
+                "ppppp..p"
+                "rnbqkbnr"),
+               ("..RK.RBB"
+                "P.PP.PPP"
+                "..P....."
+                "...N.P.."
+                "........"
+                "........"
+                ".Q..pppp"
+                "nk.Nnrbb"),
+               ("...K...."
+                "........"
+                "........"
+                "...QQ..."
+                "........"
+                "........"
+                "...r...."
+                "...k....")]
+
+    def test_init(self):
+        b=BitBoard()
+        self.assertEqual(list(Board.startposition),b.board)
+        self.assertEqual(0xff00,b.bitboards["P"])
+        self.assertEqual(1<<60,b.bitboards["k"])
+        self.assertEqual(0xffff,b.occupancy[b.BLACK])
+        self.assertEqual(0xffff<<48,b.occupancy[b.WHITE])
+
+    def test_bit_positions(self):
+        self.assertEqual([],bit_positions(0))
+        self.assertEqual([0,5,63],bit_positions(1|1<<5|1<<63))
+
+    def test_slider_attacks(self):
+        #rook on a1 blocked on a4 and c1
+        occupied=1<<32|1<<58
+        self.assertEqual([32,40,48,57,58],bit_positions(slider_attacks(56,occupied,*ROOK_RAYS)))
+        self.assertEqual([7,14,21,28,35,42,49],bit_positions(slider_attacks(56,0,*BISHOP_RAYS)))
+
+    def test_same_moves_as_board(self):
+        for position in self.positions:
+            for turn in (Board.WHITE,Board.BLACK):
+                b=Board(position,turn=turn)
+                bb=BitBoard(position,turn=turn)
+                self.assertEqual(sorted(set(b.valid_move_src_dst(turn))),sorted(bb.valid_move_src_dst(turn)))
+                self.assertEqual(b.winlossdraw(),bb.winlossdraw())
+
+    def test_is_check(self):
+        b=BitBoard("....K..."
+                "........"
+                "........"
+                "K...q..."
+                "........"
+                "........"
+                "..Q....."
+                "....k...")
+        self.assertEqual(True,b.is_check(24))
+        self.assertEqual(False,b.is_check(60))
+        self.assertEqual(True,b.is_check(12,b.BLACK))
+        self.assertEqual(False,b.is_check(11,b.BLACK))
+        self.assertEqual(True,b.is_check(58,b.WHITE))
+        self.assertEqual(True,b.is_check(4))
+        self.assertRaises(EmptySquareError,b.is_check,56)
+        self.assertRaises(InvalidColorError,b.is_check,56,2)
+
+    def test_move(self):
+        b=BitBoard()
+        b.move("a2","a4")
+        self.assertEqual(".",b.board[48])
+        self.assertEqual("p",b.board[32])
+        self.assertEqual(0xfe<<48|1<<32,b.bitboards["p"])
+        self.assertRaises(InvalidMoveError,b.move,"a2","a4")
+        self.assertRaises(InvalidMoveError,b.move,"h2","h5")
+
+    def test_castle(self):
+        b=BitBoard(self.positions[1])
+        b.move("e1","a1")
+        self.assertEqual(b.board[59],"r")
+        self.assertEqual(b.board[58],"k")
+        self.assertEqual(1<<59,b.bitboards["r"])
+        self.assertEqual(1<<58,b.bitboards["k"])
+        self.assertRaises(InvalidMoveError,b.move,"e8","h8")
+
+    def test_push_pop(self):
+        b=BitBoard(self.positions[1])
+        bitboards=b.bitboards.copy()
+        b.push(("e1","a1"))
+        b.push(("e8","h8"))
+        self.assertEqual(1<<6,b.bitboards["K"])
+        self.assertEqual(1|1<<5,b.bitboards["R"])
+        b.pop()
+        b.pop()
+        self.assertEqual(bitboards,b.bitboards)
+        self.assertEqual(list(self.positions[1]),b.board)
+
+    def test_legality(self):
+        #white rook on d2 is pinned to the king on d1 by the queen on d5
+        b=BitBoard(self.positions[4])
+        self.assertEqual((False,1<<51),b.legality(Board.WHITE))
+        self.assertEqual([27,35,43],b.moves_from(51))
+
+    def test_copy(self):
+        b=BitBoard()
+        copy=b.copy()
+        self.assertIsInstance(copy,BitBoard)
+        copy.move("e2","e4")
+        self.assertEqual(0xff<<48,b.bitboards["p"])
+        self.assertEqual(b.board,list(Board.startposition))
+
+if __name__ == '__main__':
+    unittest.main()
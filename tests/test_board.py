@@ -4,6 +4,7 @@ Unit Test for Board class
 
 import unittest
 from chess.board import *
+from chess.bitboard import BitBoard
 
 class TestBoard(unittest.TestCase):
     def test_init(self):
@@ -267,6 +268,25 @@ class TestBoard(unittest.TestCase):
         #self.assertEqual(True,b.is_check(60))
 
     
+    def test_is_square_attacked(self):
+        b=Board("....K..."
+                "........"
+                "........"
+                "K...q..."
+                "....P..."
+                ".....n.."
+                "..Q....."
+                "....k...")
+        self.assertEqual(True,b.is_square_attacked(24,b.WHITE)) # queen along row
+        self.assertEqual(True,b.is_square_attacked(12,b.WHITE)) # queen up file
+        self.assertEqual(False,b.is_square_attacked(20,b.BLACK))
+        self.assertEqual(True,b.is_square_attacked(45,b.BLACK)) # pawn takes
+        self.assertEqual(False,b.is_square_attacked(44,b.BLACK)) # pawns don't take forwards
+        self.assertEqual(True,b.is_square_attacked(62,b.WHITE)) # knight
+        self.assertEqual(True,b.is_square_attacked(52,b.WHITE)) # king
+        self.assertEqual(True,b.is_square_attacked(59,b.BLACK)) # queen diagonal
+        self.assertEqual(False,b.is_square_attacked(63,b.BLACK))
+
     def test_find_piece_index(self):
         b=Board()
         self.assertEqual(60,b.find_piece_index("e1"))
@@ -355,7 +375,53 @@ class TestBoard(unittest.TestCase):
         b.turn=b.WHITE
         b.move("a7","a8")
         self.assertEqual(True,b.is_threefold_repetition())
+        #copies share history, moves on a copy don't change the original's
+        b=Board()
+        b.move("g1","f3")
+        c=b.copy()
+        self.assertIs(b.states,c.states)
+        for move in [("g8","f6"),("f3","g1"),("f6","g8"),("g1","f3"),("g8","f6"),("f3","g1"),("f6","g8")]:
+            c.move(*move)
+        self.assertEqual(True,c.is_threefold_repetition())
+        self.assertEqual(False,b.is_threefold_repetition())
+        self.assertEqual((Board().zobrist,None),b.states)
     
+    def test_hash(self):
+        b=Board()
+        start=b.hash()
+        self.assertEqual(start,Board().hash())
+        #same position through a different move order
+        b.move("g1","f3")
+        b.move("g8","f6")
+        b.move("b1","c3")
+        b2=Board()
+        b2.move("b1","c3")
+        b2.move("g8","f6")
+        b2.move("g1","f3")
+        self.assertEqual(b.hash(),b2.hash())
+        self.assertNotEqual(start,b.hash())
+        #side to move is part of the key
+        b2.turn=b2.WHITE
+        self.assertNotEqual(b.hash(),b2.hash())
+        #moving the king loses castling so coming back is a different position
+        b=Board("R...K..R"
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                "r...k..r")
+        start=b.hash()
+        b.push(("e1","f1"))
+        b.push(("e8","f8"))
+        b.push(("f1","e1"))
+        b.push(("f8","e8"))
+        self.assertNotEqual(start,b.hash())
+        for i in range(4):
+            b.pop()
+        self.assertEqual(start,b.hash())
+
     def test_enpassant(self):
         b=Board()
         b.move("a2","a3")
@@ -380,6 +446,22 @@ class TestBoard(unittest.TestCase):
                 "rnbqkbnr")
         b.move("a1","a7")
         self.assertRaises(InvalidMoveError,b.move,"b7","a6")
+        #taking en passant removes the pawn and is only allowed straight away
+        b=Board()
+        for move in [("e2","e4"),("a7","a6"),("e4","e5"),("d7","d5")]:
+            b.move(*move)
+        self.assertIn(19,b.piece_moves("e5"))
+        b.move("e5","d6")
+        self.assertEqual(".",b.board[27])
+        b=Board()
+        for move in [("e2","e4"),("a7","a6"),("e4","e5"),("d7","d5"),("h2","h3"),("a6","a5")]:
+            b.move(*move)
+        self.assertNotIn(19,b.piece_moves("e5"))
+        #only moving 2 lets the pawn be taken en passant
+        b=Board()
+        for move in [("e2","e4"),("d7","d5"),("e4","e5"),("d5","d4"),("c2","c3")]:
+            b.move(*move)
+        self.assertEqual([],b.enpassant_check)
     
     def test_castle(self):
         b=Board("R...K..R"
@@ -402,6 +484,29 @@ class TestBoard(unittest.TestCase):
         b.turn=b.WHITE
         b.move("e2","d2")
         b.move("e8","h8")
+        #the rook can pass an attacked square but the king can't go through one
+        b=Board("R...K..R"
+                "...n...p"
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                "r...k..r")
+        b.turn=b.BLACK
+        self.assertEqual([12, 13, 3, 11, 0],b.piece_moves("e8"))
+        #castling needs the squares the king and rook land on free, the king can stay where it is
+        b=Board(".RK..QR."
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                ".rk..qr.",chess960=True)
+        self.assertEqual({1,2,6,57,58,62},b.unmoved)
+        self.assertIn(57,b.piece_moves("c1"))
+        self.assertNotIn(62,b.piece_moves("c1"))
 
     def test_winlossdraw(self):
         b=Board()
@@ -478,6 +583,133 @@ class TestBoard(unittest.TestCase):
         self.assertRaises(InvalidMoveError,b.move,"d1","e1")
         self.assertRaises(InvalidMoveError,b.move,"d2","e2")
     
+    def test_status(self):
+        b=Board()
+        self.assertEqual("",b.status())
+        self.assertEqual((True,False),b.status_cache.get(b.hash()))
+        #fool's mate
+        for move in [("f2","f3"),("e7","e5"),("g2","g4")]:
+            b.move(*move)
+            self.assertEqual(b.winlossdraw(),b.status())
+        b.move("d8","h4")
+        self.assertEqual("black win",b.status())
+        self.assertEqual((False,True),b.status_cache.get(b.hash()))
+        self.assertTrue(b.game_over())
+        #has_legal_move agrees with generating all the moves
+        random.seed(3)
+        b=Board()
+        for i in range(60):
+            moves=b.valid_move_src_dst(b.turn)
+            b.clear_caches()
+            self.assertEqual(len(moves)>0,b.has_legal_move())
+            if len(moves)==0:
+                break
+            b.move(*random.choice(moves))
+
+    def test_push_null(self):
+        b=Board()
+        b.move("e2","e4")
+        b.move("a7","a6")
+        b.move("e4","e5")
+        b.move("d7","d5")
+        start=b.hash()
+        b.push_null()
+        self.assertEqual(b.BLACK,b.turn)
+        self.assertEqual([],b.enpassant_check)
+        self.assertNotEqual(start,b.hash())
+        b.pop_null()
+        self.assertEqual(start,b.hash())
+        self.assertEqual(b.WHITE,b.turn)
+        self.assertIn(19,b.piece_moves("e5"))
+
+    def test_piece_positions(self):
+        b=Board()
+        self.assertEqual(list(range(16)),b.piece_positions(b.BLACK))
+        self.assertEqual(list(range(48,64)),b.piece_positions(b.WHITE))
+        self.assertEqual(60,b.king_square(b.WHITE))
+        self.assertEqual(4,b.king_square(b.BLACK))
+        for move in [("e2","e4"),("d7","d5"),("e4","d5"),("e8","d7"),("e1","e2")]:
+            b.push(move)
+        self.assertNotIn(27,b.pieces[b.BLACK])
+        self.assertIn(27,b.pieces[b.WHITE])
+        self.assertEqual(11,b.king_square(b.BLACK))
+        self.assertEqual(52,b.king_square(b.WHITE))
+        c=b.copy()
+        for i in range(5):
+            b.pop()
+        self.assertEqual(list(range(16)),b.piece_positions(b.BLACK))
+        self.assertEqual(60,b.king_square(b.WHITE))
+        #the copy keeps its own sets
+        self.assertEqual(52,c.king_square(c.WHITE))
+        self.assertIn(27,c.pieces[c.WHITE])
+        #castling moves the king
+        b=Board("R...K..R"
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                "........"
+                "r...k..r")
+        b.move("e1","h1")
+        self.assertEqual(62,b.king_square(b.WHITE))
+        self.assertEqual({61,62,56},b.pieces[b.WHITE])
+
+    def test_move_int(self):
+        b=Board()
+        move=b.move_to_int("e2","e4")
+        self.assertEqual(52,move_src(move))
+        self.assertEqual(36,move_dst(move))
+        self.assertTrue(move&MOVE_DOUBLE_PAWN)
+        self.assertEqual(("e2","e4"),b.int_to_move(move))
+        self.assertEqual(len(b.valid_move_src_dst(b.turn)),len(b.valid_moves_int(b.turn)))
+        self.assertEqual(b.valid_move_src_dst(b.turn),[b.int_to_move(move) for move in b.valid_moves_int(b.turn)])
+        start=b.hash()
+        b.move_int(move)
+        self.assertEqual("p",b.board[36])
+        b.pop()
+        self.assertEqual(start,b.hash())
+        #flags for takes, castling, en passant and promotion
+        b=Board("R...K..R"
+                "P......."
+                "........"
+                ".Pp....."
+                "........"
+                "........"
+                "........"
+                "r...k..r")
+        b.enpassant_check=[26,24,17]
+        b.rehash()
+        moves={b.int_to_move(move):move for move in b.valid_moves_int(b.turn)}
+        self.assertTrue(moves[("e1","h1")]&MOVE_CASTLE)
+        self.assertTrue(moves[("a1","a7")]&MOVE_CAPTURE)
+        self.assertTrue(moves[("c5","b6")]&MOVE_ENPASSANT)
+        self.assertEqual(None,move_promotion(moves[("a1","a2")]))
+        b.board[8]="."
+        b.board[9]="p"
+        b.rehash()
+        move=b.move_to_int("b7","a8")
+        self.assertEqual("q",move_promotion(move))
+        self.assertTrue(move&MOVE_CAPTURE)
+        #other pieces can be promoted to
+        b.move_int(encode_move(9,1,PROMOTION_PIECES.index("n")))
+        self.assertEqual("n",b.board[1])
+        b.pop()
+        self.assertEqual("p",b.board[9])
+
+    def test_rehash(self):
+        #editing the board list by hand then calling rehash works for both kinds of board
+        for board_class in (Board,BitBoard):
+            b=board_class()
+            b.board[52]="."
+            b.rehash()
+            moves=b.valid_move_src_dst(b.turn)
+            self.assertNotIn(("e2","e3"),moves)
+            self.assertIn(("d1","e2"),moves)
+            self.assertNotIn(52,b.pieces[b.WHITE])
+        self.assertEqual(0xef<<48,b.bitboards["p"])
+        self.assertFalse(b.occupancy[b.WHITE]>>52&1)
+
     def test_valid_move_src_dst(self):
         b=Board("K......."
                 "........"
@@ -490,6 +722,32 @@ class TestBoard(unittest.TestCase):
         self.assertEqual([('e4', 'e5'),('a1', 'b1'), ('a1', 'a2'), ('a1', 'b2')],b.valid_move_src_dst(b.turn))
         self.assertEqual([('a8', 'b8'), ('a8', 'a7'), ('a8', 'b7')],b.valid_move_src_dst(1-b.turn))
     
+    def test_push_pop(self):
+        b=Board("R...K..R"
+                ".p......"
+                "........"
+                "........"
+                "........"
+                "........"
+                "p......."
+                "r...kq..")
+        start=(b.board[:],b.turn,b.move_count,b.enpassant_check[:],b.unmoved.copy(),b.states)
+        #castle, promote, pawn move
+        for move in [("e1","a1"),("e8","h8"),("b7","b8"),("g8","g7"),("a2","a4")]:
+            b.push(move)
+        self.assertEqual(list("Rq...R.."
+                              "......K."
+                              "........"
+                              "........"
+                              "p......."
+                              "........"
+                              "........"
+                              "..kr.q.."),b.board)
+        for i in range(5):
+            b.pop()
+        self.assertEqual(start,(b.board,b.turn,b.move_count,b.enpassant_check,b.unmoved,b.states))
+        self.assertRaises(IndexError,b.pop)
+
     def test_fen_to_board(self):
         b=Board()
         self.assertEqual("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w",b.board_to_fen())
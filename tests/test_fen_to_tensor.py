@@ -0,0 +1,42 @@
+"""
+fen_to_tensor unit test
+"""
+
+from AI.fen_to_tensor import *
+from chess.board import Board
+from chess.bitboard import BitBoard
+from chess.perft import POSITIONS
+import unittest
+
+class test_fen_to_tensor(unittest.TestCase):
+    def test_board_to_tensor(self):
+        #the same tensor as going through the fen, for both boards and both turns
+        for name,fen,counts in POSITIONS:
+            for board_class in (Board,BitBoard):
+                b=board_class.from_fen(fen)
+                expected=fen_to_tensor(b.board_to_fen())
+                tensor=board_to_tensor(b)
+                self.assertEqual(np.float32,tensor.dtype)
+                self.assertTrue(np.array_equal(expected,tensor))
+                b.move_int(b.valid_moves_int(b.turn)[0])
+                self.assertTrue(np.array_equal(fen_to_tensor(b.board_to_fen()),board_to_tensor(b)))
+        #filled into the array given, everything from the last board cleared
+        out=np.ones((8,8,13),dtype=np.float32)
+        b=Board.from_fen("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - -")
+        self.assertIs(out,board_to_tensor(b,out))
+        self.assertTrue(np.array_equal(fen_to_tensor(b.board_to_fen()),out))
+
+    def test_boards_to_tensor(self):
+        boards=[BitBoard.from_fen(fen) for name,fen,counts in POSITIONS]
+        tensor=boards_to_tensor(boards)
+        self.assertEqual((len(boards),8,8,13),tensor.shape)
+        for b,board_tensor in zip(boards,tensor):
+            self.assertTrue(np.array_equal(fen_to_tensor(b.board_to_fen()),board_tensor))
+        out=np.ones((10,8,8,13),dtype=np.float32)
+        tensor=boards_to_tensor(boards[:2],out)
+        self.assertEqual((2,8,8,13),tensor.shape)
+        self.assertTrue(np.array_equal(boards_to_tensor(boards[:2]),tensor))
+        self.assertEqual((0,8,8,13),boards_to_tensor([]).shape)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+LRUCache unit test
+"""
+
+from chess.lrucache import LRUCache
+from chess.board import Board
+import unittest
+
+class test_lrucache(unittest.TestCase):
+    def test_get_put(self):
+        c=LRUCache(2)
+        self.assertEqual(None,c.get("a"))
+        c.put("a",1)
+        c.put("b",2)
+        self.assertEqual(1,c.get("a"))
+        #b is least recently used so goes first
+        c.put("c",3)
+        self.assertEqual(2,len(c))
+        self.assertNotIn("b",c)
+        self.assertEqual(1,c.get("a"))
+        self.assertEqual(3,c.get("c"))
+        self.assertEqual(3,c.hits)
+        self.assertEqual(1,c.misses)
+        self.assertEqual(0.75,c.hit_rate())
+        c.resize(1)
+        self.assertEqual(["c"],list(c.entries))
+        c.clear()
+        self.assertEqual(0,len(c))
+        self.assertEqual(0,c.hit_rate())
+
+    def test_shared_by_boards(self):
+        #the same position reached through a different move order uses the cached moves
+        b=Board()
+        for move in [("g1","f3"),("g8","f6"),("b1","c3")]:
+            b.move(*move)
+        moves=b.valid_moves_int(b.turn)
+        b2=Board()
+        for move in [("b1","c3"),("g8","f6"),("g1","f3")]:
+            b2.move(*move)
+        self.assertIs(moves,b2.valid_moves_int(b2.turn))
+        self.assertIs(moves,b.copy().valid_moves_int(b.turn))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+MoveOrdering unit test
+"""
+
+from chess.moveordering import *
+from chess.board import Board
+import unittest
+
+class test_moveordering(unittest.TestCase):
+    def test_takes(self):
+        #queen and pawn can both take the rook or the knight
+        b=Board("K......."
+                "........"
+                "...R.N.."
+                "....p..."
+                "........"
+                "........"
+                "...q...."
+                "k.......")
+        ordering=MoveOrdering()
+        moves=[b.int_to_move(move) for move in ordering.order(b,b.valid_moves_int(b.turn),0)]
+        #most valuable victim first, then least valuable attacker
+        self.assertEqual([("e5","d6"),("d2","d6")],moves[:2])
+        self.assertEqual(("e5","f6"),moves[2])
+        #transposition table move goes first
+        hash_move=b.move_to_int("a1","b1")
+        self.assertEqual(hash_move,ordering.order(b,b.valid_moves_int(b.turn),0,hash_move)[0])
+
+    def test_killers_history(self):
+        b=Board()
+        ordering=MoveOrdering()
+        moves=b.valid_moves_int(b.turn)
+        knight=b.move_to_int("g1","f3")
+        pawn=b.move_to_int("d2","d4")
+        ordering.cut_off(b,knight,2,3)
+        ordering.cut_off(b,pawn,2,3)
+        self.assertEqual([pawn,knight],ordering.killers[2])
+        self.assertEqual([pawn,knight],ordering.order(b,moves,2)[:2])
+        #other plies only have the history
+        self.assertEqual(9,ordering.history["n"][45])
+        ordering.cut_off(b,knight,5,3)
+        self.assertEqual(knight,ordering.order(b,moves,3)[0])
+        #takes aren't remembered
+        take=b.move_to_int("g1","f3")|MOVE_CAPTURE
+        ordering.cut_off(b,take,4,1)
+        self.assertEqual([0,0],ordering.killers[4])
+        ordering.new_search()
+        self.assertEqual([0,0],ordering.killers[2])
+        self.assertEqual(9,ordering.history["n"][45])
+
+if __name__ == '__main__':
+    unittest.main()
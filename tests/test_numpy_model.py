@@ -0,0 +1,60 @@
+"""
+NumpyModel unit test
+"""
+
+from AI.numpy_model import *
+from AI.export_weights import export_weights
+from AI.fen_to_tensor import boards_to_tensor
+from chess.AIEvaluationMixin import AIEvaluationMixin,load_model
+from chess.alphabetapruning import AlphabetaPruningAI
+from chess.pvs import PVSAI
+from chess.minimax import MinimaxAI
+from chess.bitboard import BitBoard
+from chess.perft import POSITIONS
+import os
+import tempfile
+import unittest
+
+class test_numpy_model(unittest.TestCase):
+    def test_same_as_keras(self):
+        keras_model,infer=load_model("AI/chess5M.keras")
+        model=NumpyModel("AI/chess5M.npz")
+        x=boards_to_tensor([BitBoard.from_fen(fen) for name,fen,counts in POSITIONS])
+        #random positions with lots of pieces give bigger evaluations
+        x=np.concatenate([x,(np.random.default_rng(1).random((20,8,8,13))<0.15).astype(np.float32)])
+        expected=infer(x).numpy()
+        output=model(x)
+        self.assertEqual((len(x),1),output.shape)
+        self.assertLess(np.abs(expected-output).max(),1e-3)
+        self.assertLess(np.abs(infer(x[:1]).numpy()-model(x[:1])).max(),1e-3)
+
+    def test_export_weights(self):
+        #the weights in the repo are what export_weights makes from the keras model
+        with tempfile.TemporaryDirectory() as folder:
+            path=os.path.join(folder,"weights.npz")
+            export_weights("AI/chess5M.keras",path)
+            with np.load(path) as exported,np.load("AI/chess5M.npz") as weights:
+                self.assertEqual(sorted(weights.files),sorted(exported.files))
+                for name in weights.files:
+                    self.assertEqual(np.float32,exported[name].dtype)
+                    self.assertTrue(np.array_equal(weights[name],exported[name]))
+
+    def test_evaluate(self):
+        e=AIEvaluationMixin("AI/chess5M.keras")
+        numpy_e=AIEvaluationMixin("AI/chess5M.keras",inference="numpy")
+        self.assertEqual("AI/chess5M.npz",numpy_e.model_file)
+        self.assertIsInstance(numpy_e.model,NumpyModel)
+        b=BitBoard.from_fen(POSITIONS[1][1])
+        self.assertAlmostEqual(e.evaluate(b),numpy_e.evaluate(b),places=3)
+
+    def test_engines(self):
+        #the engines pass inference on, and to their workers through options, without changing the default
+        for engine_class in (AlphabetaPruningAI,PVSAI):
+            engine=engine_class(BitBoard(),2,inference="numpy")
+            self.assertEqual("AI/chess5M.npz",engine.model_file)
+            self.assertEqual("numpy",engine.options["inference"])
+        self.assertEqual("AI/chess5M.npz",MinimaxAI(BitBoard(),1,inference="numpy").model_file)
+        self.assertEqual("keras",AIEvaluationMixin.inference)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+perft unit test
+"""
+
+from chess.perft import *
+import unittest
+
+class test_perft(unittest.TestCase):
+    def test_perft(self):
+        for board_class in (Board,BitBoard):
+            for name,fen,counts in POSITIONS:
+                for depth in (1,2):
+                    if depth in counts:
+                        self.assertEqual(counts[depth],perft(board_class.from_fen(fen),depth),f"{board_class.__name__} {name} depth {depth}")
+        self.assertEqual(8902,perft(BitBoard(),3))
+        self.assertEqual(2812,perft(BitBoard.from_fen(POSITIONS[2][1]),3))
+
+    def test_timed_perft(self):
+        #the second run isn't timing the moves cached by the first
+        for board_class in (Board,BitBoard):
+            board=board_class.from_fen(POSITIONS[1][1])
+            board.clear_caches() # earlier tests may have generated these positions
+            nodes,first=timed_perft(board,2)
+            nodes,second=timed_perft(board_class.from_fen(POSITIONS[1][1]),2)
+            self.assertEqual(2039,nodes)
+            self.assertLess(second,first*5,board_class.__name__)
+
+    def test_divide(self):
+        b=BitBoard.from_fen(POSITIONS[1][1])
+        counts=divide(b,2)
+        self.assertEqual(48,len(counts))
+        self.assertEqual(2039,sum(counts.values()))
+        #castling is king onto rook
+        self.assertIn(("e1","h1"),counts)
+        self.assertIn(("e1","a1"),counts)
+        #board is left as it was
+        self.assertEqual(BitBoard.from_fen(POSITIONS[1][1]).hash(),b.hash())
+
+    def test_chess960(self):
+        random.seed(1)
+        startposition=Board.randomize960()
+        first=perft(BitBoard(startposition,chess960=True),1)
+        self.assertEqual(first*first,perft(BitBoard(startposition,chess960=True),2))
+        self.assertEqual(perft(Board(startposition,chess960=True),3),perft(BitBoard(startposition,chess960=True),3))
+
+if __name__ == '__main__':
+    unittest.main()
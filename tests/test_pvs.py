@@ -0,0 +1,49 @@
+"""
+pvs unit test
+"""
+
+from chess.pvs import *
+from chess.perft import POSITIONS
+from chess import board
+import unittest
+
+class test_pvs(unittest.TestCase):
+    def test_same_evaluation(self):
+        #moves can differ when they are as good as each other but the evaluation can't
+        for name,fen,counts in POSITIONS:
+            a=AlphabetaPruning(board.Board.from_fen(fen),2)
+            p=PVS(board.Board.from_fen(fen),2)
+            a_move,p_move=a.best_move(),p.best_move()
+            self.assertEqual(a.tt.probe(a.board.hash())[1],p.tt.probe(p.board.hash())[1],name)
+
+    def test_best_move(self):
+        b=board.Board(".......K"
+                "........"
+                "........"
+                "........"
+                "........"
+                "....RR.."
+                "........"
+                "k.......")
+        b.turn=b.BLACK
+        m=PVS(b,3)
+        #mate in 2
+        self.assertEqual(('e3', 'e2'),m.best_move())
+
+    def test_aspiration(self):
+        #at depth 2 the rook is taken back so the score is a long way from the depth 1 score and the window is widened
+        b=board.Board.from_fen("4k3/8/4p3/3q4/8/8/3R4/3RK3 w - -")
+        m=PVS(b,3)
+        m.aspiration_window=0.5
+        self.assertEqual(("d2","d5"),m.best_move())
+        m=PVS(board.Board.from_fen("4k3/8/4p3/3q4/8/8/3R4/3RK3 w - -"),3,quiescence=False)
+        m.aspiration_window=0.5
+        m.best_move()
+        self.assertGreater(m.aspiration_researches,0)
+    def test_parallel(self):
+        for parallel in ("root","smp"):
+            with self.assertRaises(ValueError):
+                PVS(board.Board(),2,parallel=parallel)
+
+if __name__ == '__main__':
+    unittest.main()
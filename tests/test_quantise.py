@@ -0,0 +1,70 @@
+"""
+int8 quantisation unit test
+"""
+
+from AI.quantise import *
+from chess.AIEvaluationMixin import AIEvaluationMixin
+from chess.bitboard import BitBoard
+import tempfile
+import unittest
+
+class test_quantise(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.folder=tempfile.TemporaryDirectory()
+        cls.tflite_file=os.path.join(cls.folder.name,"chess5M.tflite")
+        quantise("AI/chess5M.keras",cls.tflite_file,random_fens(100,seed=0))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.folder.cleanup()
+
+    def test_load_fens(self):
+        path=os.path.join(self.folder.name,"evals.csv")
+        with open(path,"w") as file:
+            file.write('"7r/1p3k2/p1bPR3/5p2/2B2P1p/8/PP4P1/3K4 b - -",58\n'
+                       '"rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -",20\n'
+                       '"8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -",-30\n')
+        self.assertEqual(["7r/1p3k2/p1bPR3/5p2/2B2P1p/8/PP4P1/3K4 b - -"],load_fens(path,1))
+        self.assertEqual(["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -","8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -"],
+                         load_fens(path,5,skip=1))
+
+    def test_benchmark(self):
+        results=benchmark("AI/chess5M.keras",self.tflite_file,random_fens(100,seed=1))
+        for name in ("float latency","float throughput","int8 latency","int8 throughput"):
+            self.assertGreater(results[name],0)
+        #quantising costs some accuracy but evaluations stay close
+        self.assertLess(results["mean error"],1)
+        self.assertLessEqual(results["mean error"],results["max error"])
+
+    def test_batch_sizes(self):
+        #batches are padded to the fixed sizes or split up without changing the evaluations
+        model=TFLiteModel(self.tflite_file,batch_size=16)
+        x=np.stack([fen_to_tensor(fen) for fen in random_fens(40,seed=3)]).astype(np.float32)
+        single=np.concatenate([model(x[i:i+1]) for i in range(len(x))])
+        for size in (3,8,11,16,40):
+            self.assertEqual((size,1),model(x[:size]).shape)
+            self.assertTrue(np.allclose(single[:size],model(x[:size]),atol=1e-5))
+        self.assertEqual([1,8,16],sorted(model.interpreters))
+
+    def test_search_benchmark(self):
+        results=search_benchmark("AI/chess5M.keras",self.tflite_file,random_fens(2,seed=4))
+        for name in ("float search","float search evaluations","int8 search","int8 search evaluations"):
+            self.assertGreater(results[name],0)
+
+    def test_evaluate(self):
+        #the quantised model next to the keras file is used with the same evaluate and evaluate_batch
+        e=AIEvaluationMixin("AI/chess5M.keras")
+        int8_e=AIEvaluationMixin(os.path.join(self.folder.name,"chess5M.keras"),inference="int8")
+        self.assertRaises(ValueError,AIEvaluationMixin,"AI/chess5M.keras",inference="float")
+        self.assertEqual("keras",AIEvaluationMixin.inference)
+        self.assertEqual(self.tflite_file,int8_e.model_file)
+        self.assertIsInstance(int8_e.model,TFLiteModel)
+        boards=[BitBoard.from_fen(fen) for fen in random_fens(5,seed=2)]
+        evals=int8_e.evaluate_batch(boards)
+        for b,eval in zip(boards,evals):
+            self.assertAlmostEqual(e.evaluate(b),eval,delta=2)
+            self.assertAlmostEqual(eval,int8_e.model(np.expand_dims(fen_to_tensor(b.board_to_fen()),axis=0))[0][0],places=5)
+
+if __name__ == '__main__':
+    unittest.main()
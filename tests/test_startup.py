@@ -0,0 +1,52 @@
+"""
+Start up benchmark, engines that don't use the AI shouldn't pay for importing tensorflow
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+root=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_time(modules):
+    """
+    imports modules in a new python, returns the seconds the imports took and the heavy modules that got imported
+    """
+    code=("import sys,time\n"
+          "start=time.perf_counter()\n"
+          f"import {','.join(modules)}\n"
+          "print(time.perf_counter()-start)\n"
+          "print(' '.join(name for name in ('tensorflow','numpy','concurrent.futures') if name in sys.modules))\n")
+    output=subprocess.run([sys.executable,"-c",code],cwd=root,capture_output=True,text=True,check=True).stdout.split("\n")
+    return float(output[0]),output[1].split()
+
+class test_startup(unittest.TestCase):
+    def test_engine_import(self):
+        seconds,heavy=import_time(["chess.alphabetapruning","chess.minimax","chess.pvs"])
+        print(f"Engine import: {round(seconds*1000,1)}ms")
+        self.assertEqual([],heavy)
+        #a few milliseconds with cached bytecode, tensorflow alone takes seconds
+        self.assertLess(seconds,0.5)
+
+    def test_ai_engine(self):
+        #building an AI engine is what imports tensorflow
+        code=("import sys\n"
+              "from chess.alphabetapruning import AlphabetaPruningAI\n"
+              "from chess.board import Board\n"
+              "assert 'tensorflow' not in sys.modules\n"
+              "AlphabetaPruningAI(Board(),1)\n"
+              "assert 'tensorflow' in sys.modules\n")
+        subprocess.run([sys.executable,"-c",code],cwd=root,capture_output=True,check=True)
+
+    def test_numpy_engine(self):
+        #running the model with numpy never imports tensorflow
+        code=("import sys\n"
+              "from chess.alphabetapruning import AlphabetaPruningAI\n"
+              "from chess.board import Board\n"
+              "AlphabetaPruningAI(Board(),1,inference='numpy').best_move()\n"
+              "assert 'tensorflow' not in sys.modules\n")
+        subprocess.run([sys.executable,"-c",code],cwd=root,capture_output=True,check=True)
+
+if __name__ == '__main__':
+    unittest.main()
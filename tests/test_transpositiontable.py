@@ -0,0 +1,99 @@
+"""
+TranspositionTable unit test
+"""
+
+from chess.transpositiontable import *
+from chess.alphabetapruning import AlphabetaPruning
+from chess.board import Board
+import pickle
+import unittest
+
+class ScoreChangingWords:
+    """
+    stands in for the words of a SharedTranspositionTable, another process overwrites the score as soon as it has been read
+    """
+    def __init__(self,tt,score):
+        self.words=tt.words
+        self.floats=tt.floats
+        self.score=score
+
+    def __getitem__(self,index):
+        word=self.words[index]
+        if index%3==2:
+            self.floats[index]=self.score
+        return word
+
+class test_transpositiontable(unittest.TestCase):
+    def test_probe_store(self):
+        tt=TranspositionTable(8)
+        self.assertEqual(None,tt.probe(5))
+        tt.store(5,3,1.5,EXACT,100)
+        self.assertEqual((3,1.5,EXACT,100),tt.probe(5))
+        #13 goes in the same slot as 5
+        self.assertEqual(None,tt.probe(13))
+        self.assertEqual(3,tt.probes)
+        self.assertEqual(1,tt.hits)
+        tt.store(13,2,0,LOWER,None)
+        self.assertEqual((3,1.5,EXACT,100),tt.probe(5)) # deeper search kept
+        tt.store(13,3,0,LOWER,None)
+        self.assertEqual((3,0,LOWER,0),tt.probe(13))
+        tt.clear()
+        self.assertEqual(None,tt.probe(13))
+        self.assertEqual(0,tt.hit_rate())
+
+    def test_always_replace(self):
+        tt=TranspositionTable(8,"always")
+        tt.store(5,3,1.5,EXACT,100)
+        tt.store(13,1,-2,UPPER,7)
+        self.assertEqual(None,tt.probe(5))
+        self.assertEqual((1,-2,UPPER,7),tt.probe(13))
+        self.assertRaises(ValueError,TranspositionTable,8,"sometimes")
+
+    def test_search(self):
+        #same move with and without the table, and the table is used by the next search
+        b=Board.from_fen("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -")
+        a=AlphabetaPruning(b,4)
+        without=AlphabetaPruning(b,4)
+        without.tt.probe=lambda key:None
+        self.assertEqual(without.best_move(),a.best_move())
+        self.assertLess(a.count,without.count)
+        self.assertGreater(a.tt.cutoffs,0)
+        a.best_move()
+        self.assertEqual(0,a.count)
+
+    def test_shared(self):
+        tt=SharedTranspositionTable(8)
+        try:
+            self.assertEqual(None,tt.probe(5))
+            tt.store(5,3,1.5,EXACT,100)
+            self.assertEqual((3,1.5,EXACT,100),tt.probe(5))
+            tt.store(13,2,0,LOWER,None)
+            self.assertEqual((3,1.5,EXACT,100),tt.probe(5)) # deeper search kept
+            #full size zobrist keys and packed moves with flags
+            key=2**64-1
+            tt.store(key,12,-1000,UPPER,(1<<19)|4095)
+            self.assertEqual((12,-1000,UPPER,(1<<19)|4095),tt.probe(key))
+            #another process attaches to the same memory
+            other=pickle.loads(pickle.dumps(tt))
+            self.assertEqual((3,1.5,EXACT,100),other.probe(5))
+            other.store(6,1,2,LOWER,9)
+            other.close()
+            self.assertEqual((1,2,LOWER,9),tt.probe(6))
+            #a slot half written by another process doesn't match
+            tt.words[5*3+1]^=1<<8
+            self.assertEqual(None,tt.probe(5))
+            #the score changing after the check word matched doesn't give the new score
+            tt.store(3,2,0.5,EXACT,3)
+            tt.words=ScoreChangingWords(tt,-0.5)
+            try:
+                self.assertEqual((2,0.5,EXACT,3),tt.probe(3))
+            finally:
+                tt.words=tt.words.words
+            self.assertEqual(None,tt.probe(3))
+            tt.clear()
+            self.assertEqual(None,tt.probe(6))
+        finally:
+            tt.close()
+
+if __name__ == '__main__':
+    unittest.main()